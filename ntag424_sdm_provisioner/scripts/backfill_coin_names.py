@@ -290,20 +290,20 @@ def backfill_scans_db(csv_path: Path, db_path: Path, dry_run: bool = True) -> No
     game_manager = SqliteGameStateManager(db_path=str(db_path))
     print(f"[OK] Database connection to {db_path} successful.")
 
-    # 3. Get all scans that need updating
-    scans_to_update = game_manager._query(
-        "SELECT id, uid FROM scan_logs WHERE coin_name IS NULL OR coin_name = ''"
-    )
-
-    if not scans_to_update:
-        print("[OK] No scans in the database require backfilling.")
-        return
-
+    # 3. Stream the scans that need updating, keeping only those with a known coin
+    scanned = 0
     updates = []
-    for scan_id, uid in scans_to_update:
+    for scan_id, uid in game_manager._query_iter(
+        "SELECT id, hex(uid) FROM scan_logs WHERE coin_name IS NULL OR coin_name = ''"
+    ):
+        scanned += 1
         if uid in uid_to_coin_name:
             updates.append((uid_to_coin_name[uid], scan_id))
 
+    if not scanned:
+        print("[OK] No scans in the database require backfilling.")
+        return
+
     if not updates:
         print("No matching UIDs found between DB and key manager. Nothing to update.")
         return
@@ -319,9 +319,8 @@ def backfill_scans_db(csv_path: Path, db_path: Path, dry_run: bool = True) -> No
         return
 
     # 4. Apply updates
-    with game_manager._get_conn() as conn:
+    with game_manager._writer() as conn:
         conn.executemany("UPDATE scan_logs SET coin_name = ? WHERE id = ?", updates)
-        conn.commit()
         print(f"\nSUCCESS: Updated {len(updates)} records in the database.")
 
 def main():
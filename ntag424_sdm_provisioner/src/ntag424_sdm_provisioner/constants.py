@@ -791,6 +791,11 @@ class FileSettingsResponse:
         """
         return self.get_comm_mode().requires_auth()
 
+    @property
+    def sdm_enabled(self) -> bool:
+        """True if Secure Dynamic Messaging is enabled (FileOption bit 6)."""
+        return bool(self.file_option & FileOption.SDM_ENABLED)
+
     def __str__(self) -> str:
         lines = [
             f"File 0x{self.file_no:02X} Settings:",
@@ -812,7 +817,7 @@ class FileSettingsResponse:
             lines.append(f"    (Could not parse: {e})")
 
         # SDM information
-        sdm_enabled = bool(self.file_option & FileOption.SDM_ENABLED)
+        sdm_enabled = self.sdm_enabled
         lines.append(f"  SDM Enabled: {'YES' if sdm_enabled else 'NO'}")
 
         if sdm_enabled and self.sdm_options is not None:
@@ -1071,12 +1076,8 @@ def parse_ndef_file_data(ndef_data: bytes) -> tuple[bytes, dict]:
         data_to_parse = data_to_parse[2:]
         offset += 2
 
-    # Find NDEF record start (D1 01 ...)
-    ndef_start = -1
-    for i in range(len(data_to_parse) - 1):
-        if data_to_parse[i] == 0xD1 and data_to_parse[i + 1] == 0x01:
-            ndef_start = i
-            break
+    # Find NDEF record start (D1 01 ...); right at the front for the formats above
+    ndef_start = data_to_parse.find(b"\xd1\x01")
 
     if ndef_start == -1:
         parse_info["error"] = "No NDEF record found (D1 01)"
@@ -471,11 +471,23 @@ def calculate_entropy(data: bytes) -> float:
     if not data:
         return 0.0
 
-    total_bits = len(data) * 8
-    # Count the total number of set bits (1s) in the byte sequence
-    count_of_ones = sum(bin(byte).count('1') for byte in data)
+    # Count the total number of set bits (1s) in the byte sequence: one C-level
+    # popcount over the whole buffer as a single integer, not a loop per byte
+    count_of_ones = int.from_bytes(data, "big").bit_count()
+    return entropy_from_bit_counts(count_of_ones, len(data) * 8)
 
-    # Handle the edge case of all 0s or all 1s, where entropy is 0
+
+def entropy_from_bit_counts(count_of_ones: int, total_bits: int) -> float:
+    """calculate_entropy() for a sequence known only by its bit counts.
+
+    Args:
+        count_of_ones: Number of set bits in the sequence.
+        total_bits: Length of the sequence in bits.
+
+    Returns:
+        The calculated entropy as a float, in bits per byte.
+    """
+    # Handle the edge case of all 0s or all 1s (or no bits), where entropy is 0
     if count_of_ones == 0 or count_of_ones == total_bits:
         return 0.0
 
@@ -513,14 +525,30 @@ def nist_frequency_monobit_test(data: bytes, significance_level: float = 0.01) -
     Reference:
         NIST Special Publication 800-22, Section 2.1.
     """
-    n = len(data) * 8
+    count_of_ones = int.from_bytes(data, "big").bit_count()
+    return monobit_from_bit_counts(count_of_ones, len(data) * 8, significance_level)
+
+
+def monobit_from_bit_counts(count_of_ones: int, n: int, significance_level: float = 0.01) -> tuple[float, bool]:
+    """nist_frequency_monobit_test() for a sequence known only by its bit counts.
+
+    The monobit statistic depends on nothing but the number of ones and the length,
+    so callers that can count (e.g. in SQL) need not materialize the sequence.
+
+    Args:
+        count_of_ones: Number of set bits in the sequence.
+        n: Length of the sequence in bits. Must be at least 100.
+        significance_level: The P-value threshold for passing the test.
+
+    Returns:
+        A tuple of the P-value and whether the test passed.
+    """
     if n < 100:
         raise ValueError("Data must be at least 100 bits long for the Monobit test.")
 
     # 1. Convert the sequence of 0s and 1s to a sequence of -1s and +1s.
     #    S_n is the sum of this new sequence.
     #    A more direct way to calculate S_n is (count_of_ones - count_of_zeros).
-    count_of_ones = sum(bin(byte).count('1') for byte in data)
     count_of_zeros = n - count_of_ones
     s_n = count_of_ones - count_of_zeros
 
@@ -7,8 +7,10 @@ Implements the KeyManager protocol for compatibility with provisioning flow.
 import csv
 import json
 import logging
+import os
 import secrets
 import shutil
+from collections.abc import Iterable, Iterator
 from contextlib import contextmanager
 from dataclasses import asdict, dataclass, fields
 from datetime import datetime
@@ -211,6 +213,8 @@ class CsvKeyManager:
         log.info(f"[CSV MANAGER] Initialized with csv_path: {self.csv_path.absolute()}")
         log.info(f"[CSV MANAGER] Backup path: {self.backup_path.absolute()}")
         log.info(f"[CSV MANAGER] Timestamped backup dir: {self.timestamped_backup_dir.absolute()}")
+        self._session_rows: dict[str, dict[str, str]] | None = None
+        self._session_dirty = False
         self._ensure_csv_exists()
         self._ensure_backup_dir_exists()
 
@@ -228,6 +232,54 @@ class CsvKeyManager:
                 writer.writeheader()
             print(f"[INFO] Created backup database: {self.backup_path}")
 
+    @contextmanager
+    def session(self) -> Iterator["CsvKeyManager"]:
+        """Keep the key database in memory for a batch of operations.
+
+        The CSV is parsed once on entry; lookups and updates inside the block work
+        on the in-memory rows. On exit, pending changes are written back once
+        (with a single timestamped backup) even if the block raised, because the
+        tags themselves have already been changed. Nested sessions reuse the
+        outer one.
+
+        Example:
+            with key_mgr.session():
+                for card in cards:
+                    FormatService(card, key_mgr).format_tag(key)
+        """
+        if self._session_rows is not None:
+            yield self
+            return
+
+        self._session_rows = {row["uid"].upper(): row for row in self._read_rows()}
+        self._session_dirty = False
+        try:
+            yield self
+        finally:
+            rows, self._session_rows = self._session_rows, None
+            if self._session_dirty:
+                self._session_dirty = False
+                self._create_timestamped_backup()
+                self._write_rows(rows.values())
+
+    def _read_rows(self) -> list[dict[str, str]]:
+        """Read all rows of the main CSV."""
+        if not self.csv_path.exists():
+            return []
+        log.debug(f"[CSV READ] Reading from: {self.csv_path.absolute()}")
+        with self.csv_path.open(newline="") as f:
+            return list(csv.DictReader(f))
+
+    def _write_rows(self, rows: Iterable[dict[str, str]]):
+        """Write all rows to a temp file and atomically replace the main CSV."""
+        tmp_path = self.csv_path.with_name(self.csv_path.name + ".tmp")
+        log.debug(f"[CSV WRITE] Writing to: {self.csv_path.absolute()}")
+        with tmp_path.open("w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=self.FIELDNAMES)
+            writer.writeheader()
+            writer.writerows(rows)
+        os.replace(tmp_path, self.csv_path)
+
     def _ensure_backup_dir_exists(self):
         """Create timestamped backup directory if it doesn't exist."""
         if not self.timestamped_backup_dir.exists():
@@ -291,8 +343,14 @@ class CsvKeyManager:
         Returns:
             TagKeys object with tag's keys
         """
+        if self._session_rows is not None:
+            row = self._session_rows.get(uid.uid)
+            if row is not None:
+                row = dict(row)
+                row["outcome"] = Outcome(row.get("outcome", "invalid"))
+                return TagKeys(**row)
         # 1. Search main CSV first
-        if self.csv_path.exists():
+        elif self.csv_path.exists():
             log.debug(f"[CSV READ] Reading from: {self.csv_path.absolute()}")
             with self.csv_path.open(newline="") as f:
                 reader = csv.DictReader(f, fieldnames=self.FIELDNAMES)
@@ -492,6 +550,18 @@ class CsvKeyManager:
         Args:
             keys: TagKeys object to save
         """
+        # Get UID string for comparison and storage
+        uid_str = keys.uid.uid if hasattr(keys.uid, 'uid') else str(keys.uid)
+
+        if self._session_rows is not None:
+            row_dict = asdict(keys)
+            row_dict["uid"] = uid_str  # Ensure UID is string, not UID object
+            row_dict["outcome"] = keys.outcome.value  # Convert Outcome enum to string
+            self._session_rows[uid_str.upper()] = row_dict
+            self._session_dirty = True
+            log.info(f"[OK] Saved keys for UID {keys.uid} (status: {keys.status}, pending session write)")
+            return
+
         # Backup existing keys before updating
         self._create_timestamped_backup()
 
@@ -499,9 +569,6 @@ class CsvKeyManager:
         rows = []
         found = False
 
-        # Get UID string for comparison and storage
-        uid_str = keys.uid.uid if hasattr(keys.uid, 'uid') else str(keys.uid)
-
         if self.csv_path.exists():
             log.debug(f"[CSV READ] Reading from: {self.csv_path.absolute()}")
             with self.csv_path.open(newline="") as f:
@@ -527,14 +594,55 @@ class CsvKeyManager:
             rows.append(new_row)
 
         # Write back
-        log.debug(f"[CSV WRITE] Writing to: {self.csv_path.absolute()}")
-        with self.csv_path.open("w", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=self.FIELDNAMES)
-            writer.writeheader()
-            writer.writerows(rows)
+        self._write_rows(rows)
 
         log.info(f"[OK] Saved keys for UID {keys.uid} (status: {keys.status})")
 
+    def update_tag_fields(self, uid: UID, **updates: str) -> bool:
+        """Update selected fields of an existing tag row in a single CSV pass.
+
+        Unlike get_tag_keys() + save_tag_keys(), the CSV is read once and written
+        once, and a UID that is not in the database is left alone rather than
+        being added with factory keys.
+
+        Args:
+            uid: Tag UID
+            **updates: TagKeys field names mapped to their new string values
+
+        Returns:
+            True if the row was updated, False if the UID is not in the database
+
+        Raises:
+            ValueError: If a field name is not a TagKeys field
+        """
+        unknown = updates.keys() - set(self.FIELDNAMES)
+        if unknown:
+            raise ValueError(f"Unknown TagKeys fields: {sorted(unknown)}")
+
+        if self._session_rows is not None:
+            row = self._session_rows.get(uid.uid)
+            if row is None:
+                return False
+            row.update(updates)
+            self._session_dirty = True
+            log.info(f"[OK] Updated {', '.join(updates)} for UID {uid.uid} (pending session write)")
+            return True
+
+        rows = self._read_rows()
+        for row in rows:
+            if row["uid"].upper() == uid.uid:
+                row.update(updates)
+                break
+        else:
+            return False
+
+        # Backup existing keys before updating
+        self._create_timestamped_backup()
+        self._write_rows(rows)
+
+        log.info(f"[OK] Updated {', '.join(updates)} for UID {uid.uid}")
+        return True
+
 
     def _create_timestamped_backup(self):
         """Create a timestamped backup copy of the entire database.
@@ -608,6 +716,9 @@ class CsvKeyManager:
         Returns:
             List of TagKeys objects
         """
+        if self._session_rows is not None:
+            return [TagKeys(**row) for row in self._session_rows.values()]
+
         with self.csv_path.open(newline="") as f:
             reader = csv.DictReader(f)
             tags = [TagKeys(**row) for row in reader]
@@ -174,6 +174,24 @@ class NTag424CardConnection:
     def __init__(self, connection: CardConnection, sequence_logger: SequenceLogger):
         self.connection = connection
         self.sequence_logger = sequence_logger
+        # Per-session state; CardManager makes a fresh connection for every card tap
+        self.selected_aid: bytes | None = None  # AID of the last successful SELECT by name
+        self.version_info = None  # GetChipVersion result, see tool_helpers.get_chip_version
+
+    def invalidate_cache(self) -> None:
+        """Forget the selected application and chip version, e.g. after FormatPICC."""
+        self.selected_aid = None
+        self.version_info = None
+
+    def _track_selection(self, apdu: list[int], sw1: int, sw2: int) -> None:
+        """Remember which application an ISO SELECT left active."""
+        if len(apdu) < 5 or apdu[0] != 0x00 or apdu[1] != 0xA4:
+            return
+        if apdu[2] == 0x04 and (sw1, sw2) in ((0x90, 0x00), (0x91, 0x00)):
+            self.selected_aid = bytes(apdu[5 : 5 + apdu[4]])
+        else:
+            # File selects (and failed selects) leave no known application selected
+            self.selected_aid = None
 
     def __str__(self) -> str:
         return str(self.connection.getReader())
@@ -397,6 +415,7 @@ class NTag424CardConnection:
                 self.sequence_logger.log_response(
                     f"{sw1:02X}{sw2:02X}", format_status_word(sw1, sw2), hexb(data)
                 )
+                self._track_selection(apdu, sw1, sw2)
                 return list(data), sw1, sw2
             except Exception as e:
                 log.error(f"Error during control() command: {e}")
@@ -411,6 +430,7 @@ class NTag424CardConnection:
             self.sequence_logger.log_response(
                 f"{sw1:02X}{sw2:02X}", format_status_word(sw1, sw2), hexb(data)
             )
+            self._track_selection(apdu, sw1, sw2)
             return data, sw1, sw2
 
     def _detect_command_name(self, apdu: list[int]) -> str:
@@ -1,8 +1,15 @@
+import json
 import logging
+import weakref
 from os import getenv
 from pathlib import Path
 from flask import Flask, current_app, render_template, request
 
+try:
+    import orjson
+except ImportError:  # orjson ships with the [server] extra; stdlib json is the fallback
+    orjson = None
+
 # Import from sibling modules in the same package
 from ntag424_sdm_provisioner.csv_key_manager import UID, CsvKeyManager
 from ntag424_sdm_provisioner.log_utils import mask_key
@@ -28,6 +35,17 @@ def init_managers(app, key_csv_path, db_path):
     app.flip_off_service = FlipOffService(db_path=db_path)
     app.coin_message_service = CoinMessageService(db_path=db_path)
 
+def jsonify_fast(payload):
+    """Serialize a JSON response with orjson (stdlib json if it isn't installed).
+
+    Used by endpoints the dashboard polls every second, where encoding cost matters.
+    """
+    if orjson is not None:
+        body = orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    else:
+        body = json.dumps(payload, separators=(",", ":"))
+    return current_app.response_class(body, mimetype="application/json")
+
 def parse_params(uid_str: str, ctr_str: str):
     uid = UID(uid_str)
     ctr_int = int(ctr_str, 16)
@@ -41,6 +59,9 @@ def create_app(key_csv_path="data/tag_keys.csv", db_path="data/app.db"):
         Path("data").mkdir(exist_ok=True)
         init_managers(current_app, key_csv_path, db_path)
 
+    # The game manager buffers scans; write them out when the app is collected or at exit
+    weakref.finalize(app, app.game_manager.close)
+
     @app.route("/")
     def index():
         """Render the page. No flip recorded here — JS calls /api/flip after load."""
@@ -74,7 +95,7 @@ def create_app(key_csv_path="data/tag_keys.csv", db_path="data/app.db"):
                 params_display = {"Coin Name": tag_keys.coin_name, "Asset Tag": uid.asset_tag}
                 if is_test_mode:
                     params_display["TEST"] = "YES"
-                last_counter = game_manager.get_state(uid_str).last_counter
+                last_counter = game_manager.get_state(uid.uid).last_counter
                 tap_valid = is_test_mode or (
                     bool(cmac)
                     and ctr_int > last_counter
@@ -164,7 +185,7 @@ def create_app(key_csv_path="data/tag_keys.csv", db_path="data/app.db"):
         if not validation_result["valid"]:
             return {"error": "CMAC verification failed"}, 401
 
-        state = game_manager.get_state(uid_str)
+        state = game_manager.get_state(uid.uid)
         if not is_test_mode and ctr_int <= state.last_counter:
             log.warning("[REPLAY] Illegal replay detected for %s", uid_str)
             return {"error": "Replay detected"}, 409
@@ -173,10 +194,12 @@ def create_app(key_csv_path="data/tag_keys.csv", db_path="data/app.db"):
         active_before = flip_off_service.get_active_challenge(coin_name) if coin_name else None
 
         game_manager.update_state(
-            uid_str, ctr_int, new_outcome_str, coin_name=coin_name, cmac=cmac, is_test=is_test_mode
+            uid.uid, ctr_int, new_outcome_str, coin_name=coin_name, cmac=cmac, is_test=is_test_mode
         )
 
         if not is_test_mode and coin_name:
+            # FlipOffService reads scan_logs on its own connection, so the flip must be on disk
+            game_manager.flush()
             flip_off_service.record_flip(coin_name)
 
         active_challenges = flip_off_service.get_all_active_challenges()
@@ -191,7 +214,7 @@ def create_app(key_csv_path="data/tag_keys.csv", db_path="data/app.db"):
         recent_flips = game_manager.get_recent_flips()
         latest_flip = recent_flips[0] if recent_flips else None
         msgs = current_app.coin_message_service.get_messages(coin_name) if coin_name else ("", "")
-        joke = get_random_joke() if new_outcome_str.lower() in ("heads", "tails") else None
+        joke = get_random_joke() if new_outcome_str in ("heads", "tails") else None
         return {
             "outcome": new_outcome_str.upper(),
             "coin_name": coin_name,
@@ -261,6 +284,8 @@ def create_app(key_csv_path="data/tag_keys.csv", db_path="data/app.db"):
         if not challenger_coin or not challenged_coin:
             return {"error": "Missing coin names"}, 400
 
+        # The challenge baseline is MAX(scan_logs.id); buffered flips must not land after it
+        current_app.game_manager.flush()
         try:
             challenge_id = flip_off_service.create_challenge(challenger_coin, challenged_coin, flip_count)
         except FlipOffError as e:
@@ -324,19 +349,32 @@ def create_app(key_csv_path="data/tag_keys.csv", db_path="data/app.db"):
 
     @app.route("/api/recent_flips")
     def api_recent_flips():
+        """Recent flips + totals. Polled by the dashboard, so unchanged data returns 304.
+
+        The ETag is the newest flip id (plus the test-mode flag, which changes totals),
+        so a poll with a matching If-None-Match skips both DB reads.
+        """
         game_manager = current_app.game_manager
         is_test_mode = bool(request.args.get("drew_test_outcome", ""))
-        return {
+        etag = f"{game_manager.max_flip_id}-{int(is_test_mode)}"
+        if etag in request.if_none_match:
+            return "", 304
+
+        response = jsonify_fast({
             "recent_flips": game_manager.get_recent_flips(),
             "totals": game_manager.get_totals(include_test=is_test_mode),
-        }
+        })
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "max-age=1"
+        return response
 
     return app
 
-# Create the Flask app instance for Gunicorn to discover
-app = create_app()
+# No module-level app instance: importing this module must not open the key CSV or
+# create the database. Gunicorn uses "server.app:create_app()"; `flask run` finds the factory.
 
 if __name__ == "__main__":
+    app = create_app()
     port = getenv("PORT", "5000")
     log.info(f"Starting Flask app on port {port}...")
     app.run(host="127.0.0.1", port=int(port), debug=False)
@@ -4,7 +4,7 @@ from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Optional
 
-from ntag424_sdm_provisioner.crypto.crypto_primitives import calculate_entropy
+from ntag424_sdm_provisioner.crypto.crypto_primitives import entropy_from_bit_counts
 
 log = logging.getLogger(__name__)
 
@@ -50,15 +50,13 @@ class FlipOffService:
                     end_condition TEXT CHECK(end_condition IN ('win','draw','yield','expired'))
                 )
             """)
-            conn.commit()
-            try:
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(flip_off_challenges)")}
+            if "end_condition" not in columns:
                 conn.execute(
                     "ALTER TABLE flip_off_challenges ADD COLUMN end_condition TEXT"
                     " CHECK(end_condition IN ('win','draw','yield','expired'))"
                 )
-                conn.commit()
-            except Exception:
-                pass  # column already exists
+            conn.commit()
 
     def create_challenge(
         self, challenger_coin: str, challenged_coin: str, flip_count: int
@@ -224,24 +222,20 @@ class FlipOffService:
         Filters by scan_logs.id > baseline_scan_id (set at challenge creation time)
         to avoid timestamp collision issues.
         """
+        # Entropy depends only on the bit counts, so count the first N flips in SQL
         with self._get_conn() as conn:
-            cursor = conn.execute(
-                """SELECT LOWER(outcome) FROM scan_logs
-                   WHERE coin_name = ? AND id > ? AND is_test IS FALSE
-                     AND LOWER(outcome) IN ('heads', 'tails')
-                   ORDER BY id ASC LIMIT ?""",
+            total_bits, total_heads = conn.execute(
+                """SELECT COUNT(*), COUNT(CASE WHEN outcome = 'heads' THEN 1 END) FROM (
+                       SELECT outcome FROM scan_logs
+                       WHERE coin_name = ? AND id > ? AND is_test = 0
+                         AND outcome IN ('heads', 'tails')
+                       ORDER BY id ASC LIMIT ?
+                   )""",
                 (coin_name, baseline_scan_id, n),
-            )
-            rows = cursor.fetchall()
-
-        if not rows:
-            return 0.0
+            ).fetchone()
 
-        bit_string = "".join("1" if r[0] == "heads" else "0" for r in rows)
-        if len(bit_string) % 8 != 0:
-            bit_string += "0" * (8 - len(bit_string) % 8)
-        byte_sequence = int(bit_string, 2).to_bytes(len(bit_string) // 8, byteorder="big")
-        return calculate_entropy(byte_sequence)
+        # Measured over the zero-padded byte length, as the packed sequence was
+        return entropy_from_bit_counts(total_heads, (total_bits + 7) // 8 * 8)
 
     def get_latest_challenge(self, coin_name: str) -> Optional[dict]:
         """Returns the most recent non-expired challenge for a coin (any status except expired)."""
@@ -1,28 +1,114 @@
+import asyncio
 import logging
+import queue
 import sqlite3
+import threading
 from abc import ABC, abstractmethod
-from dataclasses import asdict, dataclass, field
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import ClassVar, Dict
+from typing import ClassVar, Dict, Iterator
 
 from ntag424_sdm_provisioner.crypto.crypto_primitives import (
-    calculate_entropy,
-    nist_frequency_monobit_test,
+    entropy_from_bit_counts,
+    monobit_from_bit_counts,
 )
 from ntag424_sdm_provisioner.csv_key_manager import UID
 
 
 log = logging.getLogger(__name__)
 
-@dataclass
+# Per-connection tuning; SQLite forgets these when a connection closes.
+_CONN_PRAGMAS = (
+    "PRAGMA busy_timeout=30000",  # FlipOffService writes the same file on its own connections
+    "PRAGMA synchronous=NORMAL",  # safe under WAL; fsync at checkpoint, not every commit
+    "PRAGMA cache_size=-20000",  # ~20 MB page cache
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+)
+
+# Hot-path SQL as module constants so each call reuses the connection's prepared statement
+# Columns in TagGameState field order, so a row unpacks straight into the constructor
+_SQL_GET_STATE = (
+    "SELECT outcome, coin_name, counter, timestamp FROM scan_logs WHERE uid = ? ORDER BY counter DESC LIMIT 1"
+)
+_SQL_INSERT_SCAN = (
+    "INSERT INTO scan_logs (uid, counter, outcome, coin_name, cmac, is_test) VALUES (?, ?, ?, ?, ?, ?)"
+)
+_SQL_RECENT_FLIPS = "SELECT coin_name, hex(uid), outcome, timestamp FROM scan_logs ORDER BY id DESC LIMIT ?"
+# Seeds the in-memory totals: production and all-rows heads/tails in one scan.
+# COUNT(CASE ...) yields 0 rather than NULL on an empty table.
+_SQL_TOTALS = (
+    "SELECT COUNT(CASE WHEN outcome = 'heads' AND is_test = 0 THEN 1 END),"
+    " COUNT(CASE WHEN outcome = 'tails' AND is_test = 0 THEN 1 END),"
+    " COUNT(CASE WHEN outcome = 'heads' THEN 1 END),"
+    " COUNT(CASE WHEN outcome = 'tails' THEN 1 END)"
+    " FROM scan_logs WHERE outcome IN ('heads', 'tails')"
+)
+# Test rows are filtered with "is_test = 0" rather than "IS FALSE" throughout: equality is
+# an index key term on idx_outcome / idx_coin_name_outcome, IS FALSE only a residual check
+
+_STATEMENT_CACHE_SIZE = 256
+
+# Read connections per manager. Queries check one out and return it, so the number of
+# open connections stays fixed however many threads or greenlets serve requests.
+_READ_POOL_SIZE = 4
+
+# scan_logs schema revision stored in PRAGMA user_version; see fix_db()
+SCHEMA_VERSION = 5
+
+# Write-behind: scans are buffered and inserted in one transaction per batch
+_FLUSH_INTERVAL_S = 0.1
+_FLUSH_BATCH_SIZE = 500
+
+
+def _uid_blob(uid: str) -> bytes | str:
+    """Legacy hex-text UID as bytes; text that is not hex is left as it was."""
+    try:
+        return bytes.fromhex(uid)
+    except ValueError:
+        return uid
+
+
+@lru_cache(maxsize=4096)
+def _asset_tag(uid_str: str) -> str:
+    """UID(uid_str).asset_tag, memoized: recent-flip lists repeat the same few coins."""
+    return UID(uid_str).asset_tag
+
+
+def _sequence_stats(total_bits: int, total_heads: int) -> dict:
+    """Runs the randomness tests on a flip sequence (HEADS=1, TAILS=0).
+
+    Entropy and the monobit test depend only on how many bits are set, so the
+    sequence is described by its counts. It is measured as if packed into whole
+    bytes, zero-padded at the tail, as the byte-based tests always saw it.
+    """
+    if not total_bits:
+        return {"total_bits": 0, "total_heads": 0, "total_tails": 0, "entropy": 0.0, "nist_monobit_p_value": None, "nist_monobit_passed": None, "error": "No flips to analyze."}
+
+    total_tails = total_bits - total_heads
+    padded_bits = (total_bits + 7) // 8 * 8
+
+    entropy = entropy_from_bit_counts(total_heads, padded_bits)
+    p_value, passed, error = None, None, None
+    try:
+        p_value, passed = monobit_from_bit_counts(total_heads, padded_bits)
+    except ValueError as e:
+        error = str(e)
+
+    return {"total_bits": total_bits, "total_heads": total_heads, "total_tails": total_tails, "entropy": entropy, "nist_monobit_p_value": p_value, "nist_monobit_passed": passed, "nist_error": error}
+
+
+@dataclass(slots=True)
 class TagGameState:
     """Game state for a single NTAG424 DNA tag."""
     uid: str
     outcome: str = ""  # "heads" or "tails"
     coin_name: str = ""  # Shared identifier for both sides of the coin
     last_counter: int = 0
-    last_seen: str = field(default_factory=lambda: datetime.now().isoformat())
+    last_seen: str = ""  # DB timestamp of the latest scan; empty if never scanned
 
 class IGameStateManager(ABC):
     """Interface for game state persistence."""
@@ -51,161 +137,390 @@ class SqliteGameStateManager(IGameStateManager):
 
     def __init__(self, db_path: str = "data/app.db"):
         self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # A fixed pool of read connections, one shared writer behind a lock
+        self._conns: list[sqlite3.Connection] = []
+        self._conns_lock = threading.Lock()
+        self._writer_lock = threading.Lock()
+        self._writer_conn = self._connect()
+        self._read_pool: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        for _ in range(_READ_POOL_SIZE):
+            self._read_pool.put(self._connect_reader())
+        # Buffered scan rows; _flush_lock serializes swap+insert so a reader's flush()
+        # cannot return while another thread's batch is still being written
+        self._pending: list[tuple] = []
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flush_timer: threading.Timer | None = None
+        # Heads/tails totals keyed by include_test: seeded from SQL in _init_db, then
+        # counted as scans are buffered (this process is the only scan_logs writer)
+        self._totals: dict[bool, dict[str, int]] = {}
+        # Aggregates keyed by include_test; cleared on every update_state. A result is only
+        # stored if no write happened while it was computed (_cache_version unchanged).
+        self._cache_version = 0
+        self._leaderboard_cache: dict[bool, list[dict]] = {}
+        # Randomness analyses keyed by (include_test, coin_name), valid while max_flip_id holds
+        self._analysis_lock = threading.Lock()
+        self._analysis_cache_id = -1
+        self._analysis_cache: dict[tuple, dict] = {}
+        self._analysis_pool: ThreadPoolExecutor | None = None
         self._init_db()
 
-    def _get_conn(self):
-        return sqlite3.connect(self.db_path)
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode: reads never hold a transaction open; writes use explicit BEGIN
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=_STATEMENT_CACHE_SIZE,
+        )
+        for pragma in _CONN_PRAGMAS:
+            conn.execute(pragma)
+        with self._conns_lock:
+            self._conns.append(conn)
+        return conn
+
+    def _connect_reader(self) -> sqlite3.Connection:
+        conn = self._connect()
+        # Writes go through _writer(); a reader that tries one fails instead of
+        # taking the write lock out from under the shared writer
+        conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    @contextmanager
+    def _reader(self):
+        """Checks out a pooled read connection, waiting if all are in use."""
+        conn = self._read_pool.get()
+        try:
+            yield conn
+        finally:
+            self._read_pool.put(conn)
+
+    @contextmanager
+    def _writer(self):
+        """Runs a write transaction on the shared writer connection."""
+        with self._writer_lock:
+            conn = self._writer_conn
+            # Take the write lock up front; a deferred BEGIN could hit SQLITE_BUSY midway
+            # when FlipOffService holds the lock, instead of waiting out busy_timeout
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            if conn.in_transaction:
+                conn.execute("COMMIT")
+
+    def flush(self):
+        """Writes any buffered scans. Called before every read for read-your-writes.
+
+        If the insert fails the rows go back to the front of the buffer, where the
+        in-memory totals already count them, and a timed retry is scheduled.
+        """
+        with self._flush_lock:
+            with self._pending_lock:
+                pending, self._pending = self._pending, []
+                timer, self._flush_timer = self._flush_timer, None
+            if timer is not None:
+                timer.cancel()
+            if not pending:
+                return
+            try:
+                with self._writer() as conn:
+                    conn.executemany(_SQL_INSERT_SCAN, pending)
+                    self._max_flip_id = conn.execute("SELECT MAX(id) FROM scan_logs").fetchone()[0]
+            except BaseException:
+                with self._pending_lock:
+                    self._pending[:0] = pending
+                    if self._flush_timer is None:
+                        self._start_flush_timer()
+                raise
+            log.debug("[GAME STATE SQLITE] Flushed %d buffered scan(s)", len(pending))
+
+    def _start_flush_timer(self):
+        """Schedules a background flush. Caller holds _pending_lock."""
+        self._flush_timer = threading.Timer(_FLUSH_INTERVAL_S, self._flush_on_timer)
+        self._flush_timer.daemon = True
+        self._flush_timer.start()
+
+    def _flush_on_timer(self):
+        try:
+            self.flush()
+        except sqlite3.Error:
+            # flush() kept the rows and scheduled the retry; nobody is waiting on this thread
+            log.exception("[GAME STATE SQLITE] Background flush failed; will retry")
+
+    def close(self):
+        """Flushes buffered scans and closes every pooled connection. Safe to call more than once.
+
+        The owner of the manager calls this; create_app() ties it to the app's lifetime.
+        """
+        if self._analysis_pool is not None:
+            self._analysis_pool.shutdown(wait=True)
+            self._analysis_pool = None
+        if self._conns:
+            self.flush()
+        with self._conns_lock:
+            conns, self._conns = self._conns, []
+        for conn in conns:
+            conn.close()
 
     def fix_db(self, conn: sqlite3.Connection):
-        """Migration: Add coin_name and is_test columns if they don't exist."""
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA table_info(scan_logs)")
-        columns = {row[1] for row in cursor.fetchall()}
+        """Migration: bring scan_logs up to SCHEMA_VERSION, tracked in PRAGMA user_version.
+
+        Up-to-date databases return after reading one header field. Databases created
+        before versioning (user_version 0) may already have some columns, so the column
+        list is consulted only while migrating.
+        """
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(scan_logs)")}
 
-        if 'coin_name' not in columns:
-            cursor.execute("ALTER TABLE scan_logs ADD COLUMN coin_name TEXT DEFAULT ''")
+        if version < 1 and 'coin_name' not in columns:
+            conn.execute("ALTER TABLE scan_logs ADD COLUMN coin_name TEXT DEFAULT ''")
             log.info("[MIGRATION] Added coin_name column to scan_logs")
 
-        if 'is_test' not in columns:
-            cursor.execute("ALTER TABLE scan_logs ADD COLUMN is_test BOOLEAN NOT NULL DEFAULT FALSE")
+        if version < 2 and 'is_test' not in columns:
+            conn.execute("ALTER TABLE scan_logs ADD COLUMN is_test BOOLEAN NOT NULL DEFAULT FALSE")
             log.info("[MIGRATION] Added is_test column to scan_logs")
 
+        if version < 3:
+            # Outcomes are stored lowercase so queries compare the column directly and
+            # plain indexes apply; fold any legacy mixed-case rows once.
+            conn.execute("UPDATE scan_logs SET outcome = LOWER(outcome) WHERE outcome != LOWER(outcome)")
+            conn.execute("DROP INDEX IF EXISTS idx_outcome_lower")
+            conn.execute("DROP INDEX IF EXISTS idx_coin_outcome")
+            log.info("[MIGRATION] Normalized scan_logs outcomes to lowercase")
+
+        if version < 4:
+            # UIDs are stored as raw bytes (7 for NTAG424) rather than 14-char hex text:
+            # half the size in idx_uid_counter and memcmp comparisons on lookup.
+            conn.create_function("uid_blob", 1, _uid_blob, deterministic=True)
+            conn.execute("UPDATE scan_logs SET uid = uid_blob(uid) WHERE typeof(uid) = 'text'")
+            log.info("[MIGRATION] Converted scan_logs UIDs to BLOB")
+
+        if version < 5:
+            # Superseded by the covering idx_uid_counter_cov
+            conn.execute("DROP INDEX IF EXISTS idx_uid_counter")
+
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
     def _init_db(self):
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        with self._get_conn() as conn:
-            # Table for historical logs (every scan)
+        # WAL is persistent in the DB file: readers no longer block the insert writer.
+        # journal_mode cannot change inside a transaction, so set it before _writer().
+        self._writer_conn.execute("PRAGMA journal_mode=WAL")
+        self._writer_conn.execute("PRAGMA wal_autocheckpoint=1000")
+
+        with self._writer() as conn:
+            # Table for historical logs (every scan). Plain INTEGER PRIMARY KEY still hands
+            # out increasing rowids (rows are never deleted) without AUTOINCREMENT's
+            # sqlite_sequence write on every insert.
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS scan_logs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    id INTEGER PRIMARY KEY,
                     timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    uid TEXT NOT NULL,
+                    uid BLOB NOT NULL,
                     counter INTEGER NOT NULL,
-                    outcome TEXT NOT NULL,
+                    outcome TEXT NOT NULL CHECK (outcome = LOWER(outcome)),
                     cmac TEXT,
                     coin_name TEXT DEFAULT '',
                     is_test BOOLEAN NOT NULL DEFAULT FALSE
                 )
             """)
-            # Index for faster lookups
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_uid_counter ON scan_logs (uid, counter)")
+            # get_state() reads every column it needs from this index: one descent, no table lookup
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_uid_counter_cov"
+                " ON scan_logs (uid, counter DESC, outcome, timestamp, coin_name)"
+            )
 
-            # Add new columns if they don't exist (for backward compatibility)
+            # Bring older databases up to date (for backward compatibility)
             self.fix_db(conn)
-            conn.commit()
 
-    def _query(self, sql: str, params: tuple = ()):
-        with self._get_conn() as conn:
-            # Get the latest scan for this UID
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_outcome ON scan_logs (outcome, is_test)")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_coin_name_outcome ON scan_logs (coin_name, outcome, is_test)"
+            )
+            # Production-only (the default for every dashboard query) and covering for the
+            # per-coin leaderboard aggregate; is_test is listed so the planner sees it covered
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_prod_coin_outcome_ts"
+                " ON scan_logs (coin_name, outcome, timestamp, is_test) WHERE is_test = 0"
+            )
+            if self._indexes_missing_stats(conn):
+                conn.execute("ANALYZE scan_logs")
+
+            self._max_flip_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM scan_logs").fetchone()[0]
+            prod_heads, prod_tails, all_heads, all_tails = conn.execute(_SQL_TOTALS).fetchone()
+            self._totals = {
+                False: {"heads": prod_heads, "tails": prod_tails},
+                True: {"heads": all_heads, "tails": all_tails},
+            }
+
+    @staticmethod
+    def _indexes_missing_stats(conn: sqlite3.Connection) -> bool:
+        """True until ANALYZE has recorded statistics for every scan_logs index."""
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+            return True
+        return conn.execute("""
+            SELECT 1 FROM sqlite_master
+            WHERE type = 'index' AND tbl_name = 'scan_logs' AND name NOT LIKE 'sqlite_%'
+              AND name NOT IN (SELECT idx FROM sqlite_stat1 WHERE idx IS NOT NULL)
+            LIMIT 1
+        """).fetchone() is not None
+
+    @property
+    def max_flip_id(self) -> int:
+        """Id of the newest scan_logs row; changes whenever a flip is recorded."""
+        self.flush()
+        return self._max_flip_id
+
+    def _query_all(self, sql: str, params: tuple = ()) -> list[tuple]:
+        self.flush()
+        with self._reader() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        if log.isEnabledFor(logging.DEBUG):
             log.debug(f"[GAME STATE SQLITE] Executing query: {sql}")
-            cursor = conn.execute( sql, params)
-            rows = cursor.fetchall()
             log.debug(f"[GAME STATE SQLITE] - Rows fetched: {len(rows)}")
-            return rows
+        return rows
+
+    def _query_iter(self, sql: str, params: tuple = (), chunk_size: int = 4096) -> Iterator[tuple]:
+        """Like _query_all() for large results: rows are fetched chunk_size at a time."""
+        self.flush()
+        with self._reader() as conn:
+            cursor = conn.execute(sql, params)
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug(f"[GAME STATE SQLITE] Executing query: {sql}")
+            while chunk := cursor.fetchmany(chunk_size):
+                yield from chunk
+
+    def _query_one(self, sql: str, params: tuple = ()) -> tuple | None:
+        """Like _query_all() for single-row queries (aggregates, LIMIT 1): no list built."""
+        self.flush()
+        with self._reader() as conn:
+            row = conn.execute(sql, params).fetchone()
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug(f"[GAME STATE SQLITE] Executing query: {sql}")
+        return row
 
     def get_state(self, uid: str) -> TagGameState:
-        uid = uid.upper()
-        with self._get_conn() as conn:
-            # Get the latest scan for this UID
-            cursor = conn.execute(
-                "SELECT outcome, counter, timestamp, coin_name FROM scan_logs WHERE uid = ? ORDER BY counter DESC LIMIT 1",
-                (uid,)
-            )
-            row = cursor.fetchone()
-
-            if row:
-                return TagGameState(
-                    uid=uid,
-                    outcome=row[0],
-                    last_counter=row[1],
-                    last_seen=row[2],
-                    coin_name=row[3]
-                )
-            else:
-                return TagGameState(uid=uid)
+        assert uid == uid.upper(), "UIDs are uppercased at the HTTP boundary"
+        self.flush()
+        # Latest scan for this UID
+        with self._reader() as conn:
+            row = conn.execute(_SQL_GET_STATE, (bytes.fromhex(uid),)).fetchone()
+        if row is None:
+            return TagGameState(uid)
+        return TagGameState(uid, *row)
 
     def update_state(self, uid: str, counter: int, outcome: str, coin_name: str = "", cmac: str = "", is_test: bool = False):
         """Logs a new scan event to the database.
 
+        The row is buffered and written by flush(), which runs on a short timer, when
+        the buffer fills, or before any read on this manager.
+
         Args:
-            uid: The UID of the tag scanned.
+            uid: The UID of the tag scanned, uppercase hex.
             counter: The SDM counter value from the scan.
-            outcome: The result of the flip (e.g., "heads", "tails").
+            outcome: The result of the flip, lowercase (e.g., "heads", "tails").
             coin_name: The name of the coin associated with the tag.
             cmac: The CMAC value from the scan for verification.
             is_test: A boolean flag indicating if the scan is a test event.
         """
-        uid = uid.upper()
-        with self._get_conn() as conn:
-            conn.execute(
-                "INSERT INTO scan_logs (uid, counter, outcome, coin_name, cmac, is_test) VALUES (?, ?, ?, ?, ?, ?)",
-                (uid, counter, outcome.lower(), coin_name, cmac, is_test)
-            )
-            conn.commit()
+        assert uid == uid.upper(), "UIDs are uppercased at the HTTP boundary"
+        assert outcome == outcome.lower(), "outcomes are stored lowercase"
+        with self._pending_lock:
+            self._pending.append((bytes.fromhex(uid), counter, outcome, coin_name, cmac, is_test))
+            self._count_scan(outcome, is_test)
+            self._cache_version += 1
+            self._leaderboard_cache.clear()
+            batch_full = len(self._pending) >= _FLUSH_BATCH_SIZE
+            if not batch_full and self._flush_timer is None:
+                self._start_flush_timer()
+        if batch_full:
+            self.flush()
 
         log_prefix = "[TEST] " if is_test else ""
-        log.info(f"{log_prefix}[GAME STATE SQLITE] Logged scan for {uid}: coin='{coin_name}', outcome={outcome.lower()}, ctr={counter}")
+        log.info(f"{log_prefix}[GAME STATE SQLITE] Logged scan for {uid}: coin='{coin_name}', outcome={outcome}, ctr={counter}")
 
-    def get_totals(self, include_test: bool = False) -> Dict[str, int]:
-        """Get total heads and tails across all unique coins."""
-        
-        base_query = "SELECT COUNT(*) FROM scan_logs WHERE LOWER(outcome) = ?"
-        params = ['heads']
-
-        if not include_test:
-            base_query += " AND is_test IS FALSE"
-        
-        heads = self._query(base_query, tuple(params))[0][0]
+    def update_state_many(self, scans: list[tuple]):
+        """Logs a batch of scans in one transaction, written before this returns.
 
-        params = ['tails']
-        tails = self._query(base_query, tuple(params))[0][0]
+        Args:
+            scans: (uid, counter, outcome, coin_name, cmac, is_test) tuples, with the
+                same conventions as update_state().
+        """
+        rows = []
+        for uid, counter, outcome, coin_name, cmac, is_test in scans:
+            assert uid == uid.upper(), "UIDs are uppercased at the HTTP boundary"
+            assert outcome == outcome.lower(), "outcomes are stored lowercase"
+            rows.append((bytes.fromhex(uid), counter, outcome, coin_name, cmac, is_test))
+        with self._pending_lock:
+            self._pending.extend(rows)
+            for row in rows:
+                self._count_scan(row[2], row[5])
+            self._cache_version += 1
+            self._leaderboard_cache.clear()
+        # Any rows already buffered go first, in the same executemany
+        self.flush()
+        log.info(f"[GAME STATE SQLITE] Logged {len(rows)} scan(s) in one batch")
+
+    def _count_scan(self, outcome: str, is_test: bool):
+        """Adds a buffered scan to the in-memory totals. Caller holds _pending_lock."""
+        if outcome in ("heads", "tails"):
+            self._totals[True][outcome] += 1
+            if not is_test:
+                self._totals[False][outcome] += 1
 
-        return {"heads": heads, "tails": tails}
+    def get_totals(self, include_test: bool = False) -> Dict[str, int]:
+        """Get total heads and tails across all unique coins, from the in-memory counters."""
+        with self._pending_lock:
+            return dict(self._totals[include_test])
 
     def get_totals_by_coin(self) -> dict[str, dict[str, int]]:
         """Get per-coin statistics showing scan counts for each outcome."""
-        with self._get_conn() as conn:
+        self.flush()
+        # One pivoted row per coin rather than one row per (coin, outcome) pair
+        with self._reader() as conn:
             cursor = conn.execute("""
-                SELECT coin_name, outcome, COUNT(*) as count
+                SELECT coin_name, SUM(outcome = 'heads'), SUM(outcome = 'tails')
                 FROM scan_logs
-                WHERE coin_name != '' and LOWER(outcome) IN ('heads', 'tails')
-                GROUP BY coin_name, outcome
+                WHERE coin_name != '' AND outcome IN ('heads', 'tails')
+                GROUP BY coin_name
             """)
-
-            coins = {}
-            for row in cursor:
-                coin_name, outcome, count = row
-                if coin_name not in coins:
-                    coins[coin_name] = {"heads": 0, "tails": 0}
-                coins[coin_name][outcome.lower()] = count
-
-            return coins
+            return {name: {"heads": heads, "tails": tails} for name, heads, tails in cursor}
 
     def has_flip_since(self, ts: str) -> bool:
         """Returns True if any flip was recorded after the given ISO timestamp."""
-        rows = self._query("SELECT 1 FROM scan_logs WHERE timestamp > ? LIMIT 1", (ts,))
-        return len(rows) > 0
+        return self._query_one("SELECT 1 FROM scan_logs WHERE timestamp > ? LIMIT 1", (ts,)) is not None
 
     def get_recent_flips(self, limit: int = 88) -> list[dict]:
-        # Fetch the most recent scans, ensuring we get the coin_name
-        query = "SELECT coin_name, uid, LOWER(outcome), timestamp FROM scan_logs ORDER BY id DESC LIMIT ?"
-        rows = self._query(query, (limit,))
-        recent_flips = []
-        for row in rows:
-            coin_name, uid_str, outcome, timestamp = row  # coin_name is row[0]
-            recent_flips.append({
-                "coin_name": coin_name,
-                "asset_tag": UID(uid_str).asset_tag,
-                "uid": uid_str,
-                "outcome": outcome,
-                "timestamp": timestamp
-            })
-        return recent_flips
+        # Newest first: id is the rowid, so ORDER BY id DESC walks the table b-tree backwards
+        # and stops after `limit` rows. Rows are consumed straight off the cursor.
+        self.flush()
+        with self._reader() as conn:
+            cursor = conn.execute(_SQL_RECENT_FLIPS, (limit,))
+            return [
+                {
+                    "coin_name": coin_name,
+                    "asset_tag": _asset_tag(uid_str),
+                    "uid": uid_str,
+                    "outcome": outcome,
+                    "timestamp": timestamp
+                }
+                for coin_name, uid_str, outcome, timestamp in cursor
+            ]
 
 
     def analyze_flip_sequence_randomness(self, include_test: bool = False, coin_name: str | None = None) -> Dict:
         """Fetches all flip outcomes, converts them to a binary sequence (HEADS=1, TAILS=0),
         and runs randomness tests (Shannon entropy, NIST Monobit).
 
+        Results are cached per (include_test, coin_name) until a newer flip is recorded,
+        so repeat calls cost one MAX(id) lookup.
+
         Args:
             include_test: If True, includes test data in the analysis.
             coin_name: If provided, analyzes flips only for this coin.
@@ -213,8 +528,33 @@ class SqliteGameStateManager(IGameStateManager):
         Returns:
             A dictionary with the analysis results.
         """
-
-        conditions = ["LOWER(outcome) IN ('heads', 'tails')"]
+        max_id = self.max_flip_id
+        key = (include_test, coin_name)
+        with self._analysis_lock:
+            if self._analysis_cache_id != max_id:
+                self._analysis_cache_id = max_id
+                self._analysis_cache.clear()
+            cached = self._analysis_cache.get(key)
+        if cached is not None:
+            return dict(cached)
+
+        stats = self._analyze_flip_sequence_randomness(include_test, coin_name)
+        with self._analysis_lock:
+            if self._analysis_cache_id == max_id:
+                self._analysis_cache[key] = stats
+        return dict(stats)
+
+    async def analyze_async(self, include_test: bool = False, coin_name: str | None = None) -> Dict:
+        """analyze_flip_sequence_randomness on a worker thread, for async callers."""
+        if self._analysis_pool is None:
+            self._analysis_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="flip-analysis")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._analysis_pool, partial(self.analyze_flip_sequence_randomness, include_test, coin_name)
+        )
+
+    def _analyze_flip_sequence_randomness(self, include_test: bool, coin_name: str | None) -> Dict:
+        conditions = ["outcome IN ('heads', 'tails')"]
         params = []
 
         if coin_name:
@@ -222,86 +562,60 @@ class SqliteGameStateManager(IGameStateManager):
             params.append(coin_name.upper())
 
         if not include_test:
-            conditions.append("is_test IS FALSE")
-
-        query = f"SELECT LOWER(outcome) FROM scan_logs WHERE {' AND '.join(conditions)} ORDER BY id ASC"  # noqa: S608
-
-        rows = self._query(query, tuple(params))
+            conditions.append("is_test = 0")
 
-        if not rows:
-            return {"total_bits": 0, "total_heads": 0, "total_tails": 0, "entropy": 0.0, "nist_monobit_p_value": None, "nist_monobit_passed": None, "error": "No flips to analyze."}
+        # Only the counts matter to the tests, so SQLite returns two integers, not every row
+        query = f"SELECT COUNT(*), COUNT(CASE WHEN outcome = 'heads' THEN 1 END) FROM scan_logs WHERE {' AND '.join(conditions)}"  # noqa: S608
 
-        # Convert sequence to a string of bits
-        bit_string = "".join(['1' if row[0] == 'heads' else '0' for row in rows])
-        total_bits = len(bit_string)
-        total_heads = bit_string.count('1')
-        total_tails = bit_string.count('0')
+        stats = _sequence_stats(*self._query_one(query, tuple(params)))
+        if stats["total_bits"] == 0:
+            return stats
 
-        if total_bits == 0:
-            return {"total_bits": 0, "total_heads": 0, "total_tails": 0, "entropy": 0.0, "nist_monobit_p_value": None, "nist_monobit_passed": None, "error": "No flips to analyze."}
+        # Global analyses also report how many coins contributed. The heads/tails totals
+        # are already in stats: the sequence covers the same rows get_totals() counts.
+        if coin_name:
+            return stats
 
-        # Convert bit string to bytes
-        if total_bits % 8 != 0:
-            bit_string += '0' * (8 - total_bits % 8) # Pad to nearest byte
-        byte_sequence = int(bit_string, 2).to_bytes(len(bit_string) // 8, byteorder='big')
+        coin_conditions = ["coin_name IS NOT NULL", "coin_name != ''"]
+        if not include_test:
+            coin_conditions.append("is_test = 0")
+        coin_query = f"SELECT COUNT(DISTINCT coin_name) FROM scan_logs WHERE {' AND '.join(coin_conditions)}"  # noqa: S608
+        (total_coins,) = self._query_one(coin_query)
 
-        entropy = calculate_entropy(byte_sequence)
-        p_value, passed, error = None, None, None
-        try:
-            p_value, passed = nist_frequency_monobit_test(byte_sequence)
-        except ValueError as e:
-            error = str(e)
-
-        # Add extra global stats if not analyzing a specific coin
-        extra_stats = {}
-        if not coin_name:
-            totals = self.get_totals(include_test=include_test)
-            
-            # Build query to count unique coins
-            coin_conditions = ["coin_name IS NOT NULL", "coin_name != ''"]
-            coin_params = []
-            if not include_test:
-                coin_conditions.append("is_test IS FALSE")
-            coin_query = f"SELECT COUNT(DISTINCT coin_name) FROM scan_logs WHERE {' AND '.join(coin_conditions)}"
-            total_coins_result = self._query(coin_query, tuple(coin_params))
-            total_coins = total_coins_result[0][0] if total_coins_result else 0
-
-            extra_stats = {"total_coins": total_coins, "total_heads": totals.get("heads", 0), "total_tails": totals.get("tails", 0)}
-
-        return {"total_bits": total_bits, "total_heads": total_heads, "total_tails": total_tails, "entropy": entropy, "nist_monobit_p_value": p_value, "nist_monobit_passed": passed, "nist_error": error, **extra_stats}
+        return {**stats, "total_coins": total_coins}
 
     def get_leaderboard_stats(self, include_test: bool = False) -> list[dict]:
         """Calculates randomness stats for each coin and returns a ranked list.
 
+        The result is cached until the next scan is recorded.
+
         Args:
             include_test: If True, includes test data in the analysis.
         """
-        # 1. Get all unique coin_names
-        conditions = ["coin_name IS NOT NULL", "coin_name != ''"]
-        params = []
+        cached = self._leaderboard_cache.get(include_test)
+        if cached is not None:
+            return [dict(entry) for entry in cached]
 
+        version = self._cache_version
+        # One aggregate row per coin: its flip counts and latest timestamp
+        conditions = ["coin_name != ''", "outcome IN ('heads', 'tails')"]
         if not include_test:
-            conditions.append("is_test IS FALSE")
-            conditions.append("LOWER(outcome) IN ('heads', 'tails')")
-
-        query = f"SELECT DISTINCT coin_name FROM scan_logs WHERE {' AND '.join(conditions)}"
-        results = self._query(query, params)
-        coin_names = [row[0] for row in results]
-
-        ts_query = f"SELECT coin_name, MAX(timestamp) FROM scan_logs WHERE {' AND '.join(conditions)} GROUP BY coin_name"
-        ts_map = {row[0]: row[1] for row in self._query(ts_query, params)}
-
-        leaderboard = []
-        for coin_name in coin_names:
-            # 2. Get stats for each UID
-            stats = self.analyze_flip_sequence_randomness(include_test=include_test, coin_name=coin_name)
-            if stats and stats.get("total_bits", 0) > 0:
-                leaderboard.append({
-                    "coin_name": coin_name,
-                    "last_flip_timestamp": ts_map.get(coin_name, ""),
-                    **stats
-                })
-
-        # 3. Sort by entropy, descending
+            conditions.append("is_test = 0")
+        query = f"""
+            SELECT coin_name, COUNT(*), COUNT(CASE WHEN outcome = 'heads' THEN 1 END), MAX(timestamp)
+            FROM scan_logs WHERE {' AND '.join(conditions)}
+            GROUP BY coin_name ORDER BY coin_name
+        """  # noqa: S608
+
+        leaderboard = [
+            {"coin_name": coin_name, "last_flip_timestamp": last_ts, **_sequence_stats(total_bits, total_heads)}
+            for coin_name, total_bits, total_heads, last_ts in self._query_all(query)
+        ]
+
+        # Sort by entropy, descending
         leaderboard.sort(key=lambda x: x.get('entropy', 0), reverse=True)
-        return leaderboard
+
+        with self._pending_lock:
+            if version == self._cache_version:
+                self._leaderboard_cache[include_test] = leaderboard
+        return [dict(entry) for entry in leaderboard]
@@ -1,21 +1,92 @@
+import asyncio
+import functools
 import logging
+import struct
 from typing import Any
 
-from ntag424_sdm_provisioner.commands.get_chip_version import GetChipVersion, Ntag424VersionInfo
+from ntag424_sdm_provisioner.commands.get_chip_version import Ntag424VersionInfo
+from ntag424_sdm_provisioner.commands.get_file_counters import GetFileCounters
+from ntag424_sdm_provisioner.commands.get_file_ids import GetFileIds
 from ntag424_sdm_provisioner.commands.get_file_settings import FileSettingsResponse, GetFileSettings
 from ntag424_sdm_provisioner.commands.get_key_version import GetKeyVersion
 from ntag424_sdm_provisioner.commands.iso_commands import ISOFileID, ISOReadBinary, ISOSelectFile
-from ntag424_sdm_provisioner.commands.select_picc_application import SelectPiccApplication
-from ntag424_sdm_provisioner.constants import FileNo, TagStatus
+from ntag424_sdm_provisioner.constants import (
+    AccessRight,
+    AccessRights,
+    CCFileTLV,
+    FileNo,
+    SDMConfiguration,
+    StatusWord,
+    TagStatus,
+    parse_ndef_file_data,
+    validate_ndef_uri_record,
+)
 from ntag424_sdm_provisioner.csv_key_manager import CsvKeyManager, TagKeys
 from ntag424_sdm_provisioner.log_utils import mask_key
 from ntag424_sdm_provisioner.hal import NTag424CardConnection
-from ntag424_sdm_provisioner.tools.tool_helpers import read_ndef_file
+from ntag424_sdm_provisioner.tools.tool_helpers import get_chip_version, read_ndef_file, select_picc_application
 from ntag424_sdm_provisioner.uid_utils import UID
 
 
 log = logging.getLogger(__name__)
 
+# SDMConfiguration.from_ndef_data rejects any URL without all three of these parameters
+_SDM_URL_MARKERS = (b"uid=", b"ctr=", b"cmac=")
+
+# "0x00".."0xFF", indexed by byte value: file-ID lists become list lookups, not formatting
+_HEX_LUT = [f"0x{i:02X}" for i in range(256)]
+
+# Known CC file TLV tags, for naming the NDEF TLV tag in Condition 3
+_CC_TLV_VALUES = frozenset(tlv.value for tlv in CCFileTLV)
+
+# CC file, big-endian. Bytes 0-14: CCLEN, mapping version, MLe, MLc, then the NDEF File
+# Control TLV (tag, len, file ID, max size, read access, write access)
+_CC_NDEF_TLV = struct.Struct(">HBHHBBHHBB")
+# Bytes 15-22: Tag File Control TLV (tag, len, file ID, size, read access, write access)
+_CC_TAG_TLV = struct.Struct(">BBHHBB")
+
+# Status words that are expected answers on some tags rather than failures
+_ERROR_DISPATCH = {
+    StatusWord.NTAG_ILLEGAL_COMMAND_CODE: "not_supported",
+    StatusWord.NTAG_NO_SUCH_KEY: "no_such_key",
+    StatusWord.NO_SUCH_KEY: "no_such_key",
+    StatusWord.NTAG_PERMISSION_DENIED: "permission_denied",
+    StatusWord.PERMISSION_DENIED: "permission_denied",
+}
+
+# Fallback for exceptions without a status word (e.g. re-raised by the HAL as text)
+_ERROR_MARKERS = (
+    ("not_supported", ("ILLEGAL_COMMAND", "0x911C")),
+    ("no_such_key", ("NO_SUCH_KEY", "0x9140")),
+    ("permission_denied", ("PERMISSION_DENIED", "0x919D")),
+)
+
+
+@functools.lru_cache(maxsize=128)
+def _uid_from_str(uid: str) -> UID:
+    """Parse an SDM URL's UID once per distinct value across diagnostics runs."""
+    return UID(uid)
+
+
+def _fmt_field(field: dict) -> str:
+    """Format a validate_ndef_uri_record field as "0xNN ✓/✗", or "N/A" if absent."""
+    value = field["value"]
+    if value is None:
+        return "N/A"
+    return f"0x{value:02X} {'✓' if field['valid'] else '✗'}"
+
+
+def _error_kind(e: Exception) -> str | None:
+    """Classify a command failure as one of the _ERROR_DISPATCH kinds, or None."""
+    status_word = getattr(e, "status_word", None)
+    if status_word is not None:
+        return _ERROR_DISPATCH.get(status_word)
+    error_str = str(e)
+    for kind, markers in _ERROR_MARKERS:
+        if any(marker in error_str for marker in markers):
+            return kind
+    return None
+
 
 class TagDiagnosticsService:
     """Service for retrieving diagnostic information from NTAG424 DNA tags.
@@ -31,12 +102,42 @@ class TagDiagnosticsService:
     Commands are sent authenticated when keys are available, unauthenticated otherwise.
     """
 
+    # Starting point for each Android NFC check result; copied, never mutated
+    _ANDROID_CHECKS_TEMPLATE: dict[str, Any] = {
+        "condition_1_read_access_free": False,
+        "condition_2_ndef_format": False,
+        "condition_3_cc_file_valid": False,
+        "condition_4_offsets_valid": False,
+        "all_conditions_pass": False,
+    }
+
     def __init__(self, card: NTag424CardConnection, key_mgr: CsvKeyManager):
         self.card = card
         self.key_mgr = key_mgr
         self._cached_keys: TagKeys | None = None
         self._keys_checked = False
         self._cached_uid: UID | None = None
+        self._cached_status: TagStatus | None = None
+        self._file_settings_cache: dict[int, FileSettingsResponse | None] = {}
+        self._cc_data: bytes | None = None
+
+    def clear_cache(self) -> None:
+        """Forget cached tag reads, e.g. after changing file settings on the tag."""
+        self._file_settings_cache.clear()
+        self._cc_data = None
+
+    def invalidate(self, uid: UID | None = None) -> None:
+        """Forget the cached key lookup (and derived status) for a tag.
+
+        Call after provisioning writes new keys for ``uid`` so the next
+        diagnostics pass re-reads the key manager. A ``uid`` that does not
+        match the cached tag is ignored; ``None`` invalidates unconditionally.
+        """
+        if uid is not None and self._cached_uid is not None and uid != self._cached_uid:
+            return
+        self._cached_keys = None
+        self._keys_checked = False
+        self._cached_status = None
 
     def _ensure_uid_and_keys_loaded(self) -> None:
         """Load UID and check key manager for available keys.
@@ -50,7 +151,8 @@ class TagDiagnosticsService:
         # Get UID
         if not self._cached_uid:
             try:
-                version = self.card.send(GetChipVersion())
+                select_picc_application(self.card)
+                version = get_chip_version(self.card)
                 self._cached_uid = version.uid  # Already a UID object
                 log.info(f"Tag UID: {self._cached_uid.uid}")
             except Exception as e:
@@ -78,34 +180,30 @@ class TagDiagnosticsService:
         Returns:
             TagStatus enum value.
         """
-        try:
-            # Try to read UID to ensure we are connected
-            version = self.card.send(GetChipVersion())
-
-            # Check if keys exist in our database
-            try:
-                # version.uid is already a UID object
-                tag_keys = self.key_mgr.get_tag_keys(version.uid)
-                if tag_keys and tag_keys.status != "factory":
-                    return TagStatus.PROVISIONED
-            except Exception:
-                pass  # Not in DB or error reading DB
-
-            # If not in DB, check if it behaves like a factory tag (Key 0 is default)
-            # We can try to authenticate with default key 0, but that changes state.
-            # A safer check is GetKeyVersion for Key 0. Factory tags usually have version 0 or 1.
-            # But the most reliable "status" for our app is "Do we have keys for it?".
+        if self._cached_status is not None:
+            return self._cached_status
 
-            return TagStatus.FACTORY
-
-        except Exception as e:
-            log.error(f"Error determining tag status: {e}")
+        if self._keys_checked and self._cached_uid is None:
+            # A previous GetChipVersion failed; retry rather than report UNKNOWN forever
+            self._keys_checked = False
+        # Reuses the UID/key lookup done for the other diagnostics: no extra APDU once loaded
+        self._ensure_uid_and_keys_loaded()
+        if self._cached_uid is None:
             return TagStatus.UNKNOWN
 
+        # The most reliable "status" for our app is "Do we have keys for it?".
+        # Probing Key 0 with a default-key auth would change tag state.
+        if self._cached_keys and self._cached_keys.status != "factory":
+            self._cached_status = TagStatus.PROVISIONED
+        else:
+            self._cached_status = TagStatus.FACTORY
+        return self._cached_status
+
     def get_chip_info(self) -> Ntag424VersionInfo | None:
         """Get chip hardware and software version information."""
         try:
-            return self.card.send(GetChipVersion())  # type: ignore[no-any-return]
+            select_picc_application(self.card)
+            return get_chip_version(self.card)
         except Exception as e:
             log.error(f"Failed to get chip version: {e}")
             return None
@@ -125,18 +223,27 @@ class TagDiagnosticsService:
         log.info("Reading key versions (unauthenticated)")
         for key_no in range(5):
             try:
+                select_picc_application(self.card)
                 key_ver = self.card.send(GetKeyVersion(key_no))
                 versions[f"key_{key_no}"] = f"0x{key_ver.version:02X}"
             except Exception as e:
-                error_str = str(e)
                 # Check for expected errors on provisioned tags
-                if "NO_SUCH_KEY" in error_str or "0x9140" in error_str:
+                error_kind = _error_kind(e)
+                if error_kind == "no_such_key":
                     versions[f"key_{key_no}"] = "not set"
-                elif "PERMISSION_DENIED" in error_str or "0x919D" in error_str:
+                elif error_kind == "permission_denied":
                     versions[f"key_{key_no}"] = "protected"
-                else:
+                elif getattr(e, "status_word", None) is not None:
+                    # The card answered for this key; the others may still be readable
                     log.debug(f"Failed to get key {key_no} version: {e}")
                     versions[f"key_{key_no}"] = "error"
+                else:
+                    # No status word (e.g. card removed, reader error): the remaining
+                    # keys would fail the same way, one timeout each
+                    log.debug(f"Failed to get key {key_no} version: {e}")
+                    for remaining in range(key_no, 5):
+                        versions[f"key_{remaining}"] = "error"
+                    break
 
         return versions
 
@@ -145,39 +252,59 @@ class TagDiagnosticsService:
 
         NOTE: GetFileSettings typically works without authentication on factory tags,
         but may require authentication on provisioned tags depending on file ACLs.
+
+        Results (including "not readable") are cached per file until clear_cache().
         """
+        if file_no in self._file_settings_cache:
+            return self._file_settings_cache[file_no]
+        settings = self._read_file_settings(file_no)
+        self._file_settings_cache[file_no] = settings
+        return settings
+
+    def _read_file_settings(self, file_no: int) -> FileSettingsResponse | None:
         self._ensure_uid_and_keys_loaded()
 
         # Try unauthenticated first (works on factory tags and some provisioned tags)
         log.info(f"Reading file {file_no} settings (unauthenticated)")
         try:
+            select_picc_application(self.card)
             return self.card.send(GetFileSettings(file_no))  # type: ignore[no-any-return]
         except Exception as e:
-            error_str = str(e)
             # Check for expected errors on provisioned tags
-            if "PERMISSION_DENIED" in error_str or "0x919D" in error_str:
+            if _error_kind(e) == "permission_denied":
                 if self._cached_keys:
                     log.info(f"File {file_no} settings require authentication")
                 else:
                     log.info(f"File {file_no} settings require authentication (no keys in DB)")
-            elif "too short" in error_str:
+            elif "too short" in str(e):
                 log.info(f"File {file_no} settings not readable")
             else:
                 log.error(f"Failed to get file settings for file {file_no}: {e}")
             return None
 
+    def _read_cc_bytes(self) -> bytes:
+        """Read the 23-byte CC file once (SELECT + READ); cached until clear_cache().
+
+        The next native command reselects the PICC application (see select_picc_application).
+        """
+        if self._cc_data is None:
+            self.card.send(ISOSelectFile(ISOFileID.CC_FILE))
+            cc_full = self.card.send(ISOReadBinary(0, 23))
+            self._cc_data = bytes(cc_full)
+        return self._cc_data
+
     def read_cc_file(self) -> dict[str, Any]:
         """Read Capability Container (CC) file."""
         try:
-            self.card.send(ISOSelectFile(ISOFileID.CC_FILE))
-            cc_data = self.card.send(ISOReadBinary(0, 15))
-            self.card.send(SelectPiccApplication())  # Reselect App
+            # Summary covers the 15-byte header + NDEF File Control TLV prefix
+            cc_data = self._read_cc_bytes()[:15]
+            cc_len, _, _, _, _, _, _, max_size, _, _ = _CC_NDEF_TLV.unpack_from(cc_data)
 
             return {
                 "raw": cc_data.hex().upper(),
-                "magic": f"0x{int.from_bytes(cc_data[0:2], 'big'):04X}",
+                "magic": f"0x{cc_len:04X}",
                 "version": f"{cc_data[2]}.{cc_data[3]}",
-                "max_size": int.from_bytes(cc_data[11:13], "big"),
+                "max_size": max_size,
             }
         except Exception as e:
             log.error(f"Failed to read CC file: {e}")
@@ -196,10 +323,14 @@ class TagDiagnosticsService:
             log.error(f"Failed to read NDEF: {e}")
             return {"error": str(e)}
 
-    def get_full_diagnostics(self) -> dict[str, Any]:
+    def get_full_diagnostics(self, fast: bool = False) -> dict[str, Any]:
         """Collect all diagnostic information.
 
         Runs both unauthenticated and authenticated diagnostics when keys are available.
+
+        Args:
+            fast: Stop the Android NFC checks at the first failing condition
+                (see ``_check_android_nfc_conditions``).
         """
         # Load UID and check for keys FIRST to avoid burning auth attempts
         self._ensure_uid_and_keys_loaded()
@@ -251,20 +382,19 @@ class TagDiagnosticsService:
         # CC File
         diagnostics["cc_file"] = self.read_cc_file()
 
-        # NDEF
-        diagnostics["ndef"] = self.read_ndef()
+        # NDEF (also fed to the phone tap simulation below)
+        ndef_info = self.read_ndef()
+        diagnostics["ndef"] = ndef_info
 
         # GetFileIds - list all files (UNAUTHENTICATED, must run before auth session)
         # NOTE: Not supported on all NTAG424 DNA tags
         try:
-            from ntag424_sdm_provisioner.commands.get_file_ids import GetFileIds
-
             log.debug("Getting file IDs (unauthenticated)...")
+            select_picc_application(self.card)
             file_ids_response = self.card.send(GetFileIds())
-            diagnostics["file_ids"] = [f"0x{fid:02X}" for fid in file_ids_response]
+            diagnostics["file_ids"] = [_HEX_LUT[fid] for fid in file_ids_response]
         except Exception as e:
-            error_str = str(e)
-            if "ILLEGAL_COMMAND" in error_str or "0x911C" in error_str:
+            if _error_kind(e) == "not_supported":
                 log.debug("GetFileIds not supported on this tag")
                 diagnostics["file_ids"] = "Not supported"
             else:
@@ -272,25 +402,27 @@ class TagDiagnosticsService:
                 diagnostics["file_ids"] = None
 
         # GetFileCounters - SDM read counter (UNAUTHENTICATED, must run before auth session)
-        # NOTE: Only works when SDM is enabled
-        try:
-            from ntag424_sdm_provisioner.commands.get_file_counters import GetFileCounters
-
-            log.debug("Getting SDM file counters (unauthenticated)...")
-            counter = GetFileCounters(file_no=FileNo.NDEF_FILE).execute(self.card)
-            diagnostics["sdm_read_counter"] = counter
-        except Exception as e:
-            error_str = str(e)
-            if "ILLEGAL_COMMAND" in error_str or "0x911C" in error_str:
-                log.debug("GetFileCounters not supported (SDM may not be enabled)")
-                diagnostics["sdm_read_counter"] = None
-            else:
-                log.debug(f"GetFileCounters error: {e}")
-                diagnostics["sdm_read_counter"] = None
+        # NOTE: Only works when SDM is enabled - skip the APDU if the file settings say it isn't
+        if settings is not None and not settings.sdm_enabled:
+            log.debug("GetFileCounters skipped (SDM disabled in file settings)")
+            diagnostics["sdm_read_counter"] = None
+        else:
+            try:
+                log.debug("Getting SDM file counters (unauthenticated)...")
+                select_picc_application(self.card)
+                counter = GetFileCounters(file_no=FileNo.NDEF_FILE).execute(self.card)
+                diagnostics["sdm_read_counter"] = counter
+            except Exception as e:
+                if _error_kind(e) == "not_supported":
+                    log.debug("GetFileCounters not supported (SDM may not be enabled)")
+                    diagnostics["sdm_read_counter"] = None
+                else:
+                    log.debug(f"GetFileCounters error: {e}")
+                    diagnostics["sdm_read_counter"] = None
 
         # === PHONE TAP SIMULATION ===
         # Simulate what happens when a phone taps the tag
-        diagnostics["sdm_validation"] = self._simulate_phone_tap()
+        diagnostics["sdm_validation"] = self._simulate_phone_tap(ndef_info, fast=fast)
 
         # === AUTHENTICATED COMMANDS (if keys available) ===
         # NOTE: No authenticated diagnostics needed currently since all commands
@@ -301,14 +433,32 @@ class TagDiagnosticsService:
         else:
             diagnostics["authenticated"] = "No keys available"
 
+        # Leave the tag as callers expect it: PICC application selected
+        select_picc_application(self.card)
         return diagnostics
 
-    def _simulate_phone_tap(self) -> dict[str, Any]:
+    async def get_full_diagnostics_async(self, fast: bool = False) -> dict[str, Any]:
+        """get_full_diagnostics on a worker thread, for async callers.
+
+        The APDUs still run one after another: they share a single card channel,
+        and the tag processes one command at a time anyway.
+        """
+        return await asyncio.to_thread(self.get_full_diagnostics, fast)
+
+    def _simulate_phone_tap(
+        self, ndef_info: dict[str, Any] | None = None, fast: bool = False
+    ) -> dict[str, Any]:
         """Simulate a phone tap by reading the NDEF URL and validating SDM.
 
         This reads the current NDEF content from the tag and validates the SDM
         parameters (if present) using the key manager.
 
+        Args:
+            ndef_info: ``read_ndef()`` result already read by the caller; the
+                NDEF file is read from the tag when omitted
+            fast: Skip the remaining Android NFC checks (and their CC file APDUs)
+                once read access is known not to be FREE.
+
         Returns:
             Dict with phone tap simulation results and Android NFC detection checks
         """
@@ -321,28 +471,31 @@ class TagDiagnosticsService:
             "url": None,
             "has_sdm": False,
             "validation": None,
-            "android_nfc_checks": {
-                "condition_1_read_access_free": False,
-                "condition_2_ndef_format": False,
-                "condition_3_cc_file_valid": False,
-                "condition_4_offsets_valid": False,
-                "all_conditions_pass": False,
-            }
+            "android_nfc_checks": self._ANDROID_CHECKS_TEMPLATE.copy(),
         }
 
         try:
             # Read NDEF data
             log.info("[PHONE TAP] Step 1: Reading NDEF file from tag...")
-            ndef_info = self.read_ndef()
+            if ndef_info is None:
+                ndef_info = self.read_ndef()
             ndef_data = ndef_info["data"]
-            log.info(f"[PHONE TAP]   NDEF length: {len(ndef_data)} bytes")
-            log.info(f"[PHONE TAP]   NDEF raw hex: {ndef_data.hex().upper()}")
+            log.info("[PHONE TAP]   NDEF length: %d bytes", len(ndef_data))
+            if log.isEnabledFor(logging.INFO):  # hex dump of the whole file; skip when muted
+                log.info("[PHONE TAP]   NDEF raw hex: %s", ndef_data.hex().upper())
 
             # Extract SDM configuration from NDEF
             log.info("[PHONE TAP] Step 2: Parsing NDEF to extract SDM URL...")
-            from ntag424_sdm_provisioner.constants import SDMConfiguration
+            if not all(marker in ndef_data for marker in _SDM_URL_MARKERS):
+                # Factory/plain tags: skip the URL parse, which would only raise ValueError
+                result["error"] = "No SDM URL found in NDEF data"
+                log.info("[PHONE TAP]   ✗ No SDM parameters in NDEF (uid=/ctr=/cmac=)")
+                return result
 
             sdm_config = SDMConfiguration.from_ndef_data(ndef_data)
+            # Parsed once here and reused by the NDEF format check (Condition 2)
+            ndef_parse = parse_ndef_file_data(ndef_data)
+            result["ndef_parse_info"] = ndef_parse[1]
 
             if not sdm_config or not sdm_config.sdm_url:
                 result["error"] = "Could not extract URL from NDEF"
@@ -353,91 +506,100 @@ class TagDiagnosticsService:
             result["url"] = sdm_config.url
             result["sdm_config"] = sdm_config
             log.info("[PHONE TAP]   ✓ URL extracted successfully")
-            log.info(f"[PHONE TAP]   Full URL: {sdm_config.url}")
+            log.info("[PHONE TAP]   Full URL: %s", sdm_config.url)
 
             # Check if URL has SDM parameters
             result["has_sdm"] = sdm_config.has_sdm_parameters
             log.info("[PHONE TAP] Step 3: Checking for SDM parameters...")
-            log.info(f"[PHONE TAP]   Has SDM parameters: {sdm_config.has_sdm_parameters}")
+            log.info("[PHONE TAP]   Has SDM parameters: %s", sdm_config.has_sdm_parameters)
 
             if not sdm_config.has_sdm_parameters:
                 result["info"] = "URL does not contain SDM parameters"
                 log.info("[PHONE TAP]   (No SDM validation needed)")
             else:
-                # Log the parsed SDM parameters
-                log.info("[PHONE TAP] Step 4: SDM Parameters extracted from URL:")
-                log.info(f"[PHONE TAP]   UID:     {sdm_config.uid}")
-                log.info(f"[PHONE TAP]   Counter: {sdm_config.counter} (decimal)")
-                log.info(f"[PHONE TAP]   Counter: {sdm_config.counter:06X} (hex)")
-                log.info(f"[PHONE TAP]   CMAC:    {sdm_config.cmac}")
-
-                # Log offset information if available
-                if sdm_config.offsets:
-                    log.info("[PHONE TAP]   SDM Offsets in NDEF file:")
-                    log.info(f"[PHONE TAP]     UID offset:     {sdm_config.offsets.uid_offset}")
-                    log.info(f"[PHONE TAP]     Counter offset: {sdm_config.offsets.read_ctr_offset}")
-                    log.info(f"[PHONE TAP]     CMAC offset:    {sdm_config.offsets.mac_offset}")
+                # Log the parsed SDM parameters (one record; skipped entirely when INFO is muted)
+                counter = sdm_config.counter
+                if log.isEnabledFor(logging.INFO):
+                    lines = [
+                        "[PHONE TAP] Step 4: SDM Parameters extracted from URL:",
+                        f"[PHONE TAP]   UID:     {sdm_config.uid}",
+                        f"[PHONE TAP]   Counter: {counter} (decimal)",
+                        f"[PHONE TAP]   Counter: {counter:06X} (hex)",
+                        f"[PHONE TAP]   CMAC:    {sdm_config.cmac}",
+                    ]
+                    # Log offset information if available
+                    if sdm_config.offsets:
+                        lines += [
+                            "[PHONE TAP]   SDM Offsets in NDEF file:",
+                            f"[PHONE TAP]     UID offset:     {sdm_config.offsets.uid_offset}",
+                            f"[PHONE TAP]     Counter offset: {sdm_config.offsets.read_ctr_offset}",
+                            f"[PHONE TAP]     CMAC offset:    {sdm_config.offsets.mac_offset}",
+                        ]
+                    log.info("%s", "\n".join(lines))
 
                 # Validate SDM using key manager
                 log.info("[PHONE TAP] Step 5: Validating SDM CMAC...")
                 # Convert string UID to UID object for validate_sdm_url
-                uid_obj = UID(sdm_config.uid)
-                validation = self.key_mgr.validate_sdm_url(uid_obj, sdm_config.counter, sdm_config.cmac)
+                uid_obj = _uid_from_str(sdm_config.uid)
+                validation = self.key_mgr.validate_sdm_url(uid_obj, counter, sdm_config.cmac)
                 result["validation"] = validation
 
                 # Log validation summary
-                log.info("[PHONE TAP] Step 6: Validation result summary:")
-                log.info(f"[PHONE TAP]   Valid:           {validation.get('valid', False)}")
-                log.info(f"[PHONE TAP]   CMAC received:   {validation.get('cmac_received', 'N/A')}")
-                log.info(f"[PHONE TAP]   CMAC calculated: {validation.get('cmac_calculated', 'N/A')}")
-                if validation.get('sv2'):
-                    log.info(f"[PHONE TAP]   SV2 used:        {validation.get('sv2')}")
-                if validation.get('session_key'):
-                    log.info(f"[PHONE TAP]   Session key:     {mask_key(validation.get('session_key', ''))}")
+                if log.isEnabledFor(logging.INFO):
+                    lines = [
+                        "[PHONE TAP] Step 6: Validation result summary:",
+                        f"[PHONE TAP]   Valid:           {validation.get('valid', False)}",
+                        f"[PHONE TAP]   CMAC received:   {validation.get('cmac_received', 'N/A')}",
+                        f"[PHONE TAP]   CMAC calculated: {validation.get('cmac_calculated', 'N/A')}",
+                    ]
+                    if validation.get('sv2'):
+                        lines.append(f"[PHONE TAP]   SV2 used:        {validation.get('sv2')}")
+                    if validation.get('session_key'):
+                        lines.append(f"[PHONE TAP]   Session key:     {mask_key(validation.get('session_key', ''))}")
+                    log.info("%s", "\n".join(lines))
 
             # === ANDROID NFC DETECTION CHECKS ===
             log.info("[PHONE TAP] Step 7: Running Android NFC detection checks...")
-            result["android_nfc_checks"] = self._check_android_nfc_conditions(ndef_data, sdm_config)
+            result["android_nfc_checks"] = self._check_android_nfc_conditions(
+                ndef_data, sdm_config, ndef_parse=ndef_parse, fast=fast
+            )
 
         except Exception as e:
-            log.exception(f"[PHONE TAP] ✗ Simulation failed with exception: {e}")
+            log.exception("[PHONE TAP] ✗ Simulation failed with exception: %s", e)
             result["error"] = str(e)
 
         log.info("=" * 70)
-        log.info(f"[PHONE TAP SIMULATION] Complete - has_url={result.get('has_url')}, has_sdm={result.get('has_sdm')}")
+        log.info(
+            "[PHONE TAP SIMULATION] Complete - has_url=%s, has_sdm=%s", result.get('has_url'), result.get('has_sdm')
+        )
         log.info("=" * 70)
         return result
 
-    def _check_android_nfc_conditions(self, ndef_data: bytes, sdm_config: Any) -> dict[str, Any]:
+    def _check_android_nfc_conditions(
+        self,
+        ndef_data: bytes,
+        sdm_config: Any,
+        ndef_parse: tuple[bytes, dict] | None = None,
+        fast: bool = False,
+    ) -> dict[str, Any]:
         """Check all 4 conditions required for Android NFC detection.
 
         Args:
             ndef_data: Raw NDEF file bytes
             sdm_config: SDMConfiguration object
+            ndef_parse: ``parse_ndef_file_data(ndef_data)`` result, if the caller
+                already has it; parsed here otherwise
+            fast: If Condition 1 fails, Android will never read the tag: mark the
+                remaining conditions as skipped instead of checking them
 
         Returns:
             Dict with check results for each condition
         """
-        from ntag424_sdm_provisioner.constants import (
-            AccessRight,
-            CCFileTLV,
-            parse_ndef_file_data,
-            validate_ndef_uri_record,
-        )
-
-        checks = {
-            "condition_1_read_access_free": False,
-            "condition_2_ndef_format": False,
-            "condition_3_cc_file_valid": False,
-            "condition_4_offsets_valid": False,
-            "all_conditions_pass": False,
-            "details": {}
-        }
+        checks = self._ANDROID_CHECKS_TEMPLATE.copy()
+        checks["details"] = {}
 
         # CONDITION 1: File 2 Read Access = FREE (0x00 or 0x0E)
         try:
-            from ntag424_sdm_provisioner.constants import AccessRights
-
             file_settings = self.get_file_settings(FileNo.NDEF_FILE)
             if file_settings and file_settings.access_rights:
                 # Parse raw bytes into AccessRights object
@@ -452,12 +614,21 @@ class TagDiagnosticsService:
             log.debug(f"Condition 1 check error: {e}", exc_info=True)
             checks["details"]["read_access"] = f"Error: {e}"
 
+        if fast and not checks["condition_1_read_access_free"]:
+            skipped = "Skipped: read access is not FREE"
+            checks["details"]["ndef_format"] = skipped
+            checks["details"]["cc_file"] = skipped
+            checks["details"]["sdm_offsets"] = skipped
+            return checks
+
         # CONDITION 2: NDEF Format (supports both Type 4 new and old formats)
         # Type 4 new: [NLEN (2 bytes)] + [D1 01 XX 55 04 ...]
         # Type 4 old: [NLEN (2 bytes)] + [03] [Len] [D1 01 XX 55 04 ...] [FE]
         try:
             # Use shared helper functions for DRY parsing
-            ndef_record, parse_info = parse_ndef_file_data(ndef_data)
+            if ndef_parse is None:
+                ndef_parse = parse_ndef_file_data(ndef_data)
+            ndef_record, parse_info = ndef_parse
 
             if parse_info["valid"] and len(ndef_record) >= 5:
                 # Validate the NDEF URI record structure
@@ -468,10 +639,10 @@ class TagDiagnosticsService:
                     "detected_format": parse_info["format"],
                     "nlen": f"0x{parse_info['nlen']:04X}" if parse_info["nlen"] else "N/A",
                     "has_tlv_wrapper": "Yes" if parse_info["has_tlv"] else "No",
-                    "ndef_header": f"0x{validation['ndef_header']['value']:02X} {'✓' if validation['ndef_header']['valid'] else '✗'}" if validation['ndef_header']['value'] is not None else "N/A",
-                    "type_length": f"0x{validation['type_length']['value']:02X} {'✓' if validation['type_length']['valid'] else '✗'}" if validation['type_length']['value'] is not None else "N/A",
-                    "uri_type": f"0x{validation['uri_type']['value']:02X} {'✓' if validation['uri_type']['valid'] else '✗'}" if validation['uri_type']['value'] is not None else "N/A",
-                    "uri_prefix": f"0x{validation['uri_prefix']['value']:02X} {'✓' if validation['uri_prefix']['valid'] else '✗'}" if validation['uri_prefix']['value'] is not None else "N/A",
+                    "ndef_header": _fmt_field(validation["ndef_header"]),
+                    "type_length": _fmt_field(validation["type_length"]),
+                    "uri_type": _fmt_field(validation["uri_type"]),
+                    "uri_prefix": _fmt_field(validation["uri_prefix"]),
                 }
             else:
                 error_msg = parse_info.get("error", "NDEF record too short or invalid")
@@ -484,9 +655,7 @@ class TagDiagnosticsService:
             cc_info = self.read_cc_file()
             if "error" not in cc_info:
                 # Parse CC file to check for NDEF File Control TLV and Tag File Control TLV
-                self.card.send(ISOSelectFile(ISOFileID.CC_FILE))
-                cc_full = self.card.send(ISOReadBinary(0, 23))  # Read full 23 bytes
-                self.card.send(SelectPiccApplication())
+                cc_full = self._read_cc_bytes()  # Full 23 bytes, already read for cc_info
 
                 # CC File Structure (23 bytes):
                 # Bytes 0-6:   CC Header (00 17 20 01 00 00 FF)
@@ -494,20 +663,20 @@ class TagDiagnosticsService:
                 # Bytes 15-22: Tag File Control TLV (Tag 0x05) - Optional but recommended
 
                 # Check NDEF File Control TLV at bytes 7-14
-                ndef_tlv_tag = cc_full[7]
-                ndef_tlv_len = cc_full[8]
-                ndef_file_id = (cc_full[9] << 8) | cc_full[10]
-                ndef_read_access = cc_full[13]
+                (
+                    _, _, _, _,
+                    ndef_tlv_tag, ndef_tlv_len, ndef_file_id, _, ndef_read_access, _,
+                ) = _CC_NDEF_TLV.unpack_from(cc_full)
 
                 # Check Tag File Control TLV at bytes 15-22 (optional)
                 has_tag_file_tlv = False
                 tag_file_tlv_valid = False
                 if len(cc_full) >= 23:
-                    tag_tlv_tag = cc_full[15]
-                    tag_tlv_len = cc_full[16]
+                    tag_tlv_tag, tag_tlv_len, tag_file_id, _, _, _ = _CC_TAG_TLV.unpack_from(
+                        cc_full, _CC_NDEF_TLV.size
+                    )
                     if tag_tlv_tag == CCFileTLV.PROPRIETARY_FILE_CONTROL and tag_tlv_len == 0x06:
                         has_tag_file_tlv = True
-                        tag_file_id = (cc_full[17] << 8) | cc_full[18]
                         # Tag File Control TLV is valid if File ID is E1 05 (File 3)
                         tag_file_tlv_valid = (tag_file_id == 0xE105)
 
@@ -525,7 +694,7 @@ class TagDiagnosticsService:
 
                 checks["condition_3_cc_file_valid"] = cc_valid
                 checks["details"]["cc_file"] = {
-                    "ndef_tlv_tag": f"{CCFileTLV(ndef_tlv_tag).name if ndef_tlv_tag in CCFileTLV._value2member_map_ else 'UNKNOWN'} (0x{ndef_tlv_tag:02X}) {'✓' if ndef_tlv_tag == CCFileTLV.NDEF_FILE_CONTROL else '✗'}",
+                    "ndef_tlv_tag": f"{CCFileTLV(ndef_tlv_tag).name if ndef_tlv_tag in _CC_TLV_VALUES else 'UNKNOWN'} (0x{ndef_tlv_tag:02X}) {'✓' if ndef_tlv_tag == CCFileTLV.NDEF_FILE_CONTROL else '✗'}",
                     "ndef_tlv_len": f"0x{ndef_tlv_len:02X} {'✓' if ndef_tlv_len == 0x06 else '✗'}",
                     "ndef_file_id": f"File 2 (0x{ndef_file_id:04X}) {'✓' if ndef_file_id == 0xE104 else '✗'}",
                     "ndef_read_access": f"FREE (0x{ndef_read_access:02X}) {'✓' if ndef_read_access == 0x00 else '✗'}",
@@ -606,14 +775,12 @@ class TagDiagnosticsService:
         # Uses ApduCommand interface (build_apdu/parse_response), NOT AuthApduCommand
         # NOTE: Not supported on all NTAG424 DNA tags
         try:
-            from ntag424_sdm_provisioner.commands.get_file_ids import GetFileIds
-
             log.info("Getting file IDs...")
+            select_picc_application(self.card)
             file_ids_response = self.card.send(GetFileIds())
-            auth_diag["file_ids"] = [f"0x{fid:02X}" for fid in file_ids_response]
+            auth_diag["file_ids"] = [_HEX_LUT[fid] for fid in file_ids_response]
         except Exception as e:
-            error_str = str(e)
-            if "ILLEGAL_COMMAND" in error_str or "0x911C" in error_str:
+            if _error_kind(e) == "not_supported":
                 log.info("GetFileIds not supported on this tag (ILLEGAL_COMMAND)")
                 auth_diag["file_ids"] = "Not supported on this tag"
             else:
@@ -623,21 +790,24 @@ class TagDiagnosticsService:
         # GetFileCounters - SDM read counter (only works if SDM is enabled)
         # Uses .execute() method, NOT connection.send() or auth_conn.send()
         # NOTE: Not supported on all tags, and only works when SDM is enabled
-        try:
-            from ntag424_sdm_provisioner.commands.get_file_counters import GetFileCounters
-
-            log.info("Getting SDM file counters...")
-            counter = GetFileCounters(file_no=FileNo.NDEF_FILE).execute(self.card)
-            auth_diag["sdm_read_counter"] = counter
-        except Exception as e:
-            error_str = str(e)
-            # GetFileCounters only works when SDM is enabled on the file
-            if "ILLEGAL_COMMAND" in error_str or "0x911C" in error_str:
-                log.info("GetFileCounters not supported (SDM not enabled or command not available)")
-                auth_diag["sdm_read_counter"] = "N/A (not supported)"
-            else:
-                log.error(f"Failed to get file counters: {e}")
-                auth_diag["sdm_read_counter"] = f"Error: {e}"
+        settings = self.get_file_settings(FileNo.NDEF_FILE)  # cached from the unauthenticated pass
+        if settings is not None and not settings.sdm_enabled:
+            log.info("GetFileCounters skipped (SDM disabled in file settings)")
+            auth_diag["sdm_read_counter"] = "N/A (SDM disabled)"
+        else:
+            try:
+                log.info("Getting SDM file counters...")
+                select_picc_application(self.card)
+                counter = GetFileCounters(file_no=FileNo.NDEF_FILE).execute(self.card)
+                auth_diag["sdm_read_counter"] = counter
+            except Exception as e:
+                # GetFileCounters only works when SDM is enabled on the file
+                if _error_kind(e) == "not_supported":
+                    log.info("GetFileCounters not supported (SDM not enabled or command not available)")
+                    auth_diag["sdm_read_counter"] = "N/A (not supported)"
+                else:
+                    log.error(f"Failed to get file counters: {e}")
+                    auth_diag["sdm_read_counter"] = f"Error: {e}"
 
         auth_diag["status"] = "Complete"
         return auth_diag
@@ -4,15 +4,115 @@ import logging
 from collections.abc import Callable
 
 from ntag424_sdm_provisioner.commands.format_picc import FormatPICC
-from ntag424_sdm_provisioner.commands.get_chip_version import GetChipVersion
-from ntag424_sdm_provisioner.commands.select_picc_application import SelectPiccApplication
+from ntag424_sdm_provisioner.constants import StatusWord
 from ntag424_sdm_provisioner.crypto.auth_session import AuthenticateEV2
 from ntag424_sdm_provisioner.csv_key_manager import CsvKeyManager
 from ntag424_sdm_provisioner.hal import NTag424CardConnection
+from ntag424_sdm_provisioner.tools.tool_helpers import get_chip_version, select_picc_application
 
 
 log = logging.getLogger(__name__)
 
+_ZERO_KEY_HEX = "00" * 16
+
+# Banners shown after the format attempt, each logged as one multi-line message
+_COMPLETE_BANNER = "\n".join((
+    "",
+    "✓✓✓ FORMAT COMPLETE ✓✓✓",
+    "Tag has been reset to factory defaults:",
+    f"  - All keys: 0x{_ZERO_KEY_HEX}",
+    "  - All files reset",
+    "  - SDM disabled",
+    "  - All data erased",
+    "",
+    "You can now provision this tag from factory state.",
+))
+
+_WRONG_KEY_BANNER = "\n".join((
+    "",
+    "⚠⚠⚠ WRONG PICC MASTER KEY ⚠⚠⚠",
+    "",
+    "The PICC Master Key in the database does NOT match this tag.",
+    "",
+    "To fix this:",
+    "  1. Go back to Main Menu",
+    "  2. Select 'Recover Lost Keys'",
+    "  3. Scan this tag to find candidate keys",
+    "  4. Test keys until you find one that works",
+    "  5. Click 'Restore Key' to save it to database",
+    "  6. Return to Format PICC and try again",
+    "",
+    "✓ IMPORTANT: The SAME key that works for Key Recovery",
+    "             WILL work for Format PICC.",
+    "",
+))
+
+_AUTH_FAILED_BANNER = "\n".join((
+    "",
+    "⚠⚠⚠ AUTHENTICATION FAILED ⚠⚠⚠",
+    "",
+    "The PICC Master Key authentication failed.",
+    "This should NOT happen once the session was established!",
+    "",
+    "Please report this issue with the log file.",
+    "",
+))
+
+_LOCKOUT_BANNER = "\n".join((
+    "",
+    "⚠⚠⚠ TAG IN LOCKOUT MODE ⚠⚠⚠",
+    "",
+    "Too many failed authentication attempts.",
+    "The tag is temporarily locked.",
+    "",
+    "Please wait 30 seconds and try again.",
+    "",
+))
+
+_FORMAT_DISABLED_BANNER = "\n".join((
+    "",
+    "⚠⚠⚠ FORMAT PICC DISABLED ON THIS TAG ⚠⚠⚠",
+    "",
+    "This tag has FormatPICC permanently disabled.",
+    "This is a security feature to prevent factory reset attacks.",
+    "",
+    "You CANNOT factory reset this tag.",
+    "",
+    "Alternative recovery options:",
+    "  1. Use Key Recovery to find Keys 1 and 3",
+    "  2. Use Configure Keys to change keys (non-destructive)",
+    "  3. Use Setup URL to reconfigure SDM provisioning",
+    "",
+    "The tag remains fully functional - just cannot be reset.",
+    "",
+))
+
+# Status words format_tag explains to the user, keyed on ApduError.status_word
+_SW_TO_KIND = {
+    StatusWord.NTAG_AUTHENTICATION_ERROR: "auth",
+    StatusWord.NTAG_AUTHENTICATION_DELAY: "delay",
+    StatusWord.NTAG_ILLEGAL_COMMAND_CODE: "illegal",
+}
+
+# Fallback for exceptions that carry no status word
+_KIND_MARKERS = (
+    ("auth", ("AUTHENTICATION_ERROR", "0x91AE")),
+    ("delay", ("AUTHENTICATION_DELAY", "0x91AD")),
+    ("illegal", ("ILLEGAL_COMMAND", "0x911C")),
+)
+
+
+def _status_kind(e: Exception) -> str | None:
+    """Classify a format failure as "auth", "delay" or "illegal", or None."""
+    status_word = getattr(e, "status_word", None)
+    if status_word is not None:
+        return _SW_TO_KIND.get(status_word)
+    error_str = str(e)
+    for kind, markers in _KIND_MARKERS:
+        if any(marker in error_str for marker in markers):
+            return kind
+    return None
+
 
 class FormatService:
     """Service for formatting tags to factory defaults.
@@ -52,160 +152,103 @@ class FormatService:
             self._log("This will ERASE all data and reset ALL keys to factory!")
 
             # Debug: Log PICC Master Key (first 8 bytes only for security)
-            log.debug(f"PICC Master Key (first 8 bytes): {picc_master_key[:8].hex()}", stacklevel=2)
+            if log.isEnabledFor(logging.DEBUG):  # don't hex key bytes unless debugging
+                log.debug("PICC Master Key (first 8 bytes): %s", picc_master_key[:8].hex())
 
             # STEP 1: GET TAG UID
             self._log("[Step 1] Selecting PICC application...")
-            self.card.send(SelectPiccApplication())
-            log.debug("SelectPiccApplication completed", stacklevel=2)
+            select_picc_application(self.card)  # No APDU if this session already selected it
+            log.debug("SelectPiccApplication completed")
 
             self._log("[Step 1] Reading tag UID...")
-            version = self.card.send(GetChipVersion())
+            version = get_chip_version(self.card)  # Cached per card session
             self._log(f"  Tag UID: {version.uid}")
-            log.debug(f"Full version info: {version}", stacklevel=2)
+            log.debug("Full version info: %s", version)
 
-            # STEP 2: PRE-FLIGHT AUTH TEST
-            self._log("[Step 2] Testing PICC Master Key authentication...")
-            log.debug("Pre-flight: Testing authentication with Key 0", stacklevel=2)
+            # STEP 2: AUTHENTICATE (single EV2 session, reused for FormatPICC)
+            self._log("[Step 2] Authenticating with PICC Master Key...")
+            log.debug("Starting AuthenticateEV2 with Key 0 for FormatPICC")
 
-            # Test authentication WITHOUT executing FormatPICC
-            # If this fails, we stop before any destructive operation
+            # The handshake completes before anything is sent, so a wrong key
+            # stops us here before any destructive operation
             try:
-                with AuthenticateEV2(picc_master_key, key_no=0)(self.card):
-                    self._log("  ✓ Authentication test PASSED - key is correct")
-                    log.debug("Pre-flight auth test successful", stacklevel=2)
+                auth_ctx = AuthenticateEV2(picc_master_key, key_no=0)(self.card)
             except Exception as auth_error:
-                error_str = str(auth_error)
-                if "AUTHENTICATION_ERROR" in error_str or "0x91AE" in error_str:
-                    self._log("  ✗ Authentication test FAILED - wrong key")
+                if _status_kind(auth_error) == "auth":
+                    self._log("  ✗ Authentication FAILED - wrong key")
                     raise ValueError(
                         "PICC Master Key authentication failed. "
                         "The key in the database does not match this tag. "
                         "Use Key Recovery to find the correct key first."
                     ) from auth_error
-                else:
-                    raise
-
-            # STEP 3: AUTHENTICATE AND FORMAT
-            self._log("[Step 3] Authenticating for FormatPICC command...")
-            log.debug("Starting AuthenticateEV2 for FormatPICC", stacklevel=2)
+                raise
 
-            with AuthenticateEV2(picc_master_key, key_no=0)(self.card) as auth_conn:
-                self._log("  ✓ Authenticated successfully")
-                log.debug("AuthenticateEV2 session established", stacklevel=2)
+            with auth_ctx as auth_conn:
+                self._log("  ✓ Authenticated successfully - key is correct")
+                log.debug("AuthenticateEV2 session established")
 
-                # STEP 4: SEND FORMAT PICC COMMAND
-                self._log("[Step 4] Sending FORMAT PICC command (0xFC)...")
+                # STEP 3: SEND FORMAT PICC COMMAND
+                self._log("[Step 3] Sending FORMAT PICC command (0xFC)...")
                 self._log("  ⚠ This will reset the tag NOW - cannot be undone!")
-                log.debug("About to send FormatPICC command", stacklevel=2)
+                log.debug("About to send FormatPICC command")
 
                 response = auth_conn.send(FormatPICC())
-                log.debug(f"FormatPICC response: {response}", stacklevel=2)
+                log.debug("FormatPICC response: %s", response)
 
                 self._log("  ✓ Format command succeeded")
 
-            # STEP 5: UPDATE DATABASE
-            self._log("[Step 5] Updating database...")
+            # The tag was reset: don't trust the connection's cached selection/version
+            if hasattr(self.card, "invalidate_cache"):
+                self.card.invalidate_cache()
+
+            # STEP 4: UPDATE DATABASE
+            self._log("[Step 4] Updating database...")
             uid = version.uid  # Already a UID object
-            log.debug(f"Attempting to update database for UID: {uid.uid}", stacklevel=2)
+            log.debug("Attempting to update database for UID: %s", uid.uid)
             try:
-                # Try to get existing entry
-                existing_keys = self.key_mgr.get_tag_keys(uid)
-                log.debug(f"Found existing entry with status: {existing_keys.status}", stacklevel=2)
-
-                # Update to reformatted status
-                existing_keys.picc_master_key = "00000000000000000000000000000000"
-                existing_keys.app_read_key = "00000000000000000000000000000000"
-                existing_keys.sdm_mac_key = "00000000000000000000000000000000"
-                existing_keys.status = "reformatted"
-                existing_keys.notes = "Factory reset via FormatPICC - all keys now 0x00*16"
-
-                self.key_mgr.save_tag_keys(existing_keys)
-                log.debug("Database save completed successfully", stacklevel=2)
-                self._log("  ✓ Database updated - tag marked as reformatted")
+                # Single read + write of the CSV; unknown tags are left out of the database
+                updated = self.key_mgr.update_tag_fields(
+                    uid,
+                    picc_master_key=_ZERO_KEY_HEX,
+                    app_read_key=_ZERO_KEY_HEX,
+                    sdm_mac_key=_ZERO_KEY_HEX,
+                    status="reformatted",
+                    notes="Factory reset via FormatPICC - all keys now 0x00*16",
+                )
             except Exception as e:
+                log.debug("Database update failed (exception: %s)", e)
+                updated = False
+
+            if updated:
+                log.debug("Database save completed successfully")
+                self._log("  ✓ Database updated - tag marked as reformatted")
+            else:
                 # Tag not in database - no update needed
-                log.debug(f"Tag not in database (exception: {e})", stacklevel=2)
                 self._log("  Tag not in database - no update needed")
 
-            self._log("")
-            self._log("✓✓✓ FORMAT COMPLETE ✓✓✓")
-            self._log("Tag has been reset to factory defaults:")
-            self._log("  - All keys: 0x00000000000000000000000000000000")
-            self._log("  - All files reset")
-            self._log("  - SDM disabled")
-            self._log("  - All data erased")
-            self._log("")
-            self._log("You can now provision this tag from factory state.")
+            self._log(_COMPLETE_BANNER)
 
             return True
 
         except ValueError as e:
-            # Pre-flight authentication test failed - clean error message
+            # Authentication with the stored key failed - clean error message
             error_str = str(e)
-            self._log(f"✗ {error_str}")
-            self._log("")
-            self._log("⚠⚠⚠ WRONG PICC MASTER KEY ⚠⚠⚠")
-            self._log("")
-            self._log("The PICC Master Key in the database does NOT match this tag.")
-            self._log("")
-            self._log("To fix this:")
-            self._log("  1. Go back to Main Menu")
-            self._log("  2. Select 'Recover Lost Keys'")
-            self._log("  3. Scan this tag to find candidate keys")
-            self._log("  4. Test keys until you find one that works")
-            self._log("  5. Click 'Restore Key' to save it to database")
-            self._log("  6. Return to Format PICC and try again")
-            self._log("")
-            self._log("✓ IMPORTANT: The SAME key that works for Key Recovery")
-            self._log("             WILL work for Format PICC.")
-            self._log("")
-            log.error(f"Format failed - wrong PICC Master Key (pre-flight test): {e}")
+            self._log(f"✗ {error_str}\n{_WRONG_KEY_BANNER}")
+            log.error(f"Format failed - wrong PICC Master Key: {e}")
             raise
 
         except Exception as e:
-            error_str = str(e)
+            kind = _status_kind(e)
 
             # Check for authentication errors during FormatPICC execution
-            if "AUTHENTICATION_ERROR" in error_str or "0x91AE" in error_str:
-                self._log(f"✗ Format failed: {e}")
-                self._log("")
-                self._log("⚠⚠⚠ AUTHENTICATION FAILED ⚠⚠⚠")
-                self._log("")
-                self._log("The PICC Master Key authentication failed.")
-                self._log("This should NOT happen if the pre-flight test passed!")
-                self._log("")
-                self._log("Please report this issue with the log file.")
-                self._log("")
-                log.error(f"Format failed - unexpected auth failure after pre-flight: {e}", exc_info=True)
-            elif "AUTHENTICATION_DELAY" in error_str or "0x91AD" in error_str:
-                self._log(f"✗ Format failed: {e}")
-                self._log("")
-                self._log("⚠⚠⚠ TAG IN LOCKOUT MODE ⚠⚠⚠")
-                self._log("")
-                self._log("Too many failed authentication attempts.")
-                self._log("The tag is temporarily locked.")
-                self._log("")
-                self._log("Please wait 30 seconds and try again.")
-                self._log("")
+            if kind == "auth":
+                self._log(f"✗ Format failed: {e}\n{_AUTH_FAILED_BANNER}")
+                log.error(f"Format failed - unexpected auth failure after authentication: {e}", exc_info=True)
+            elif kind == "delay":
+                self._log(f"✗ Format failed: {e}\n{_LOCKOUT_BANNER}")
                 log.error(f"Format failed - authentication delay: {e}", exc_info=True)
-            elif "ILLEGAL_COMMAND" in error_str or "0x911C" in error_str:
-                self._log(f"✗ Format failed: {e}")
-                self._log("")
-                self._log("⚠⚠⚠ FORMAT PICC DISABLED ON THIS TAG ⚠⚠⚠")
-                self._log("")
-                self._log("This tag has FormatPICC permanently disabled.")
-                self._log("This is a security feature to prevent factory reset attacks.")
-                self._log("")
-                self._log("You CANNOT factory reset this tag.")
-                self._log("")
-                self._log("Alternative recovery options:")
-                self._log("  1. Use Key Recovery to find Keys 1 and 3")
-                self._log("  2. Use Configure Keys to change keys (non-destructive)")
-                self._log("  3. Use Setup URL to reconfigure SDM provisioning")
-                self._log("")
-                self._log("The tag remains fully functional - just cannot be reset.")
-                self._log("")
+            elif kind == "illegal":
+                self._log(f"✗ Format failed: {e}\n{_FORMAT_DISABLED_BANNER}")
                 log.error(f"Format failed - FormatPICC disabled on tag: {e}", exc_info=True)
             else:
                 self._log(f"✗ Format failed: {e}")
@@ -1,11 +1,19 @@
 """Key Recovery Service - Find lost keys from backup files."""
 
 import csv
+import functools
+import heapq
 import logging
+import mmap
 import os
 import re
-from dataclasses import dataclass
-from datetime import datetime
+import sys
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
+from datetime import date, datetime
+from operator import itemgetter
 from pathlib import Path
 
 from ntag424_sdm_provisioner.constants import FACTORY_KEY
@@ -20,6 +28,61 @@ log = logging.getLogger(__name__)
 # Conservative delay between authentication attempts to avoid lockout
 AUTH_RETRY_DELAY_SECONDS = 5
 
+# Factory key as the upper-case hex found in logs
+_FACTORY_KEY_HEX = FACTORY_KEY.hex().upper()
+
+# Key patterns found in provisioning logs (see _extract_all_keys_from_context).
+# Logs are scanned as raw bytes, so these are byte patterns.
+_RE_PICC_DIRECT = re.compile(rb'PICC Master Key:\s*([0-9a-fA-F]{32})')
+_RE_APP_DIRECT = re.compile(rb'App Read Key:\s*([0-9a-fA-F]{32})')
+_RE_SDM_DIRECT = re.compile(rb'SDM MAC Key(?:\s*\(Key 3\))?:\s*([0-9a-fA-F]{32})')
+_RE_PICC_CSV = re.compile(rb"picc_master_key='([0-9a-fA-F]{32})'")
+_RE_APP_CSV = re.compile(rb"app_read_key='([0-9a-fA-F]{32})'")
+_RE_SDM_CSV = re.compile(rb"sdm_mac_key='([0-9a-fA-F]{32})'")
+_RE_AUTH = re.compile(rb'Auth key:\s*([0-9a-fA-F]{32})')
+
+# UID mentions in logs: "Tag UID: 04B6694A2F7080", "UID 04B6694A2F7080" or "uid='04B6694A2F7080'"
+_RE_UID_TAG = re.compile(rb'Tag UID:\s*([0-9A-Fa-f]{14})')
+_RE_UID_CSV = re.compile(rb"(?:UID|uid[=:])[\s']*([0-9A-Fa-f]{14})")
+
+# Key search window after each UID mention. Provisioning logs "Tag UID" first
+# and the keys only after the whole ChangeKey/SDM APDU sequence.
+_CONTEXT_BYTES = 50000
+
+# Backup/log filename date: YYYYMMDD or YYYYMMDD_HHMMSS
+_RE_FILENAME_DATE = re.compile(r'(\d{8})(?:_\d{6})?')
+
+
+def _is_csv_file(name: str) -> bool:
+    return name.endswith('.csv')
+
+
+def _is_tui_log(name: str) -> bool:
+    return name.startswith('tui_') and name.endswith('.log')
+
+
+@functools.lru_cache(maxsize=32)
+def _uid_patterns(uid_normalized: str) -> tuple[re.Pattern[bytes], re.Pattern[bytes]]:
+    """_RE_UID_TAG and _RE_UID_CSV specialised to one UID.
+
+    The UID's hex letters match in either case, like the .upper() comparison
+    on the generic patterns, so finditer only stops at mentions of this tag.
+    """
+    uid_re = "".join(f"[{c}{c.lower()}]" if c.isalpha() else re.escape(c) for c in uid_normalized)
+    return (
+        re.compile(rb'Tag UID:\s*' + uid_re.encode("ascii")),
+        re.compile(rb"(?:UID|uid[=:])[\s']*" + uid_re.encode("ascii")),
+    )
+
+
+def _contains_uid(content: bytes | mmap.mmap, uid_bytes: bytes) -> bool:
+    """Substring pre-check run before parsing a file for a UID.
+
+    UIDs are written upper case (UID.uid) or lower case (hex dumps, SDM URLs),
+    so both forms are checked.
+    """
+    return content.find(uid_bytes) >= 0 or content.find(uid_bytes.lower()) >= 0
+
 
 @dataclass
 class KeyRecoveryCandidate:
@@ -36,6 +99,13 @@ class KeyRecoveryCandidate:
     file_date: str  # Date from filename or mtime
     tested: bool = False
     works: bool = False
+    score: int = field(init=False, default=0)  # 2 = complete, 1 = partial, 0 = PICC only
+
+    def __post_init__(self):
+        """Score how many of the App Read / SDM keys are known (non-factory)."""
+        app_known = self.app_read_key != FACTORY_KEY
+        sdm_known = self.sdm_file_read_key != FACTORY_KEY
+        self.score = app_known + sdm_known
 
 
 class KeyRecoveryService:
@@ -48,9 +118,60 @@ class KeyRecoveryService:
             root_path: Root directory to search for CSV files (defaults to cwd)
         """
         self.root_path = root_path or Path.cwd()
+        # UID -> (file listing with mtimes, candidates) from the last scan_for_uid
+        self._scan_cache: dict[str, tuple[tuple, list[KeyRecoveryCandidate]]] = {}
+
+    def _walk_matching(self, predicate: Callable[[str], bool]) -> Iterator[tuple[Path, float]]:
+        """Yield (path, mtime) for every file under root_path whose name matches.
+
+        Walks the whole tree including hidden directories like .history and
+        .backups. Uses os.scandir so the file/directory check comes from the
+        directory listing, and stats only the matching files. Like os.walk,
+        unreadable directories are skipped and symlinked directories are not
+        followed.
+        """
+        stack = [self.root_path]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as entries:
+                    subdirs = []
+                    for entry in entries:
+                        if entry.is_dir():
+                            if not entry.is_symlink():
+                                subdirs.append(entry.path)
+                        elif predicate(entry.name):
+                            try:
+                                yield Path(entry.path), entry.stat().st_mtime
+                            except OSError:
+                                continue  # e.g. broken symlink
+            except OSError:
+                continue
+            # Reversed so directories are visited in listing order, as os.walk does
+            stack.extend(reversed(subdirs))
+
+    def _find_files(self, predicate: Callable[[str], bool]) -> list[tuple[Path, float]]:
+        """Return (path, mtime) for matching files, sorted by mtime (newest first)."""
+        found = list(self._walk_matching(predicate))
+        found.sort(key=itemgetter(1), reverse=True)
+        return found
+
+    def _find_recovery_files(self) -> tuple[list[tuple[Path, float]], list[tuple[Path, float]]]:
+        """Find CSV and TUI log files in a single walk of the tree.
+
+        Returns:
+            (csv_files, log_files) as (path, mtime) lists, each sorted newest first
+        """
+        csv_found: list[tuple[Path, float]] = []
+        log_found: list[tuple[Path, float]] = []
+        for path, mtime in self._walk_matching(lambda name: _is_csv_file(name) or _is_tui_log(name)):
+            (csv_found if _is_csv_file(path.name) else log_found).append((path, mtime))
+
+        csv_found.sort(key=itemgetter(1), reverse=True)
+        log_found.sort(key=itemgetter(1), reverse=True)
+        return csv_found, log_found
 
     def find_all_csv_files(self) -> list[Path]:
-        """Recursively find ALL CSV files in project tree using os.walk.
+        """Recursively find ALL CSV files in project tree.
 
         Searches entire tree from root_path, including hidden directories
         like .history, .backups, etc.
@@ -58,17 +179,7 @@ class KeyRecoveryService:
         Returns:
             List of all CSV file paths found, sorted by mtime (newest first)
         """
-        csv_files: list[Path] = []
-
-        # Walk entire tree including hidden dirs
-        for dirpath, dirnames, filenames in os.walk(self.root_path):
-            # Don't skip hidden dirs - we want .history, .backups, etc.
-            for filename in filenames:
-                if filename.endswith('.csv'):
-                    csv_files.append(Path(dirpath) / filename)
-
-        # Sort by modification time (newest first)
-        csv_files.sort(key=lambda p: p.stat().st_mtime, reverse=True)
+        csv_files = [path for path, _mtime in self._find_files(_is_csv_file)]
 
         log.info(f"Found {len(csv_files)} CSV files in tree")
         return csv_files
@@ -79,16 +190,7 @@ class KeyRecoveryService:
         Returns:
             List of all log file paths found, sorted by mtime (newest first)
         """
-        log_files: list[Path] = []
-
-        # Walk entire tree including hidden dirs
-        for dirpath, dirnames, filenames in os.walk(self.root_path):
-            for filename in filenames:
-                if filename.startswith('tui_') and filename.endswith('.log'):
-                    log_files.append(Path(dirpath) / filename)
-
-        # Sort by modification time (newest first)
-        log_files.sort(key=lambda p: p.stat().st_mtime, reverse=True)
+        log_files = [path for path, _mtime in self._find_files(_is_tui_log)]
 
         log.info(f"Found {len(log_files)} TUI log files in tree")
         return log_files
@@ -106,12 +208,14 @@ class KeyRecoveryService:
             Date string in YYYY-MM-DD format
         """
         # Try to extract from filename: YYYYMMDD or YYYYMMDD_HHMMSS
-        match = re.search(r'(\d{8})(?:_\d{6})?', file_path.name)
+        match = _RE_FILENAME_DATE.search(file_path.name)
         if match:
             date_str = match.group(1)
+            year, month, day = date_str[:4], date_str[4:6], date_str[6:]
             try:
-                dt = datetime.strptime(date_str, "%Y%m%d")
-                return dt.strftime("%Y-%m-%d")
+                # date() rejects impossible dates like strptime does, without parsing a format
+                date(int(year), int(month), int(day))
+                return f"{year}-{month}-{day}"
             except ValueError:
                 pass
 
@@ -120,7 +224,36 @@ class KeyRecoveryService:
         dt = datetime.fromtimestamp(mtime)
         return dt.strftime("%Y-%m-%d")
 
-    def _extract_all_keys_from_context(self, context: str) -> dict[str, str | None]:
+    @contextmanager
+    def _map_file(self, path: Path) -> Iterator[bytes | mmap.mmap]:
+        """Map a log or CSV file read-only for scanning with byte patterns.
+
+        Pages are read on demand instead of decoding the whole file into a str.
+        Empty files (which cannot be mapped) yield b"".
+        """
+        with path.open("rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield b""
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                yield mm
+
+    def _find_uid_mentions(self, content: bytes | mmap.mmap) -> Iterator[tuple[str, int]]:
+        """Yield (uppercase UID, offset) for every UID mention in a log, in file order.
+
+        Matches "Tag UID: <uid>" plus the CSV update formats "UID <uid>" and "uid='<uid>'".
+        Each pattern's matches are already in order, so the two streams are merged
+        rather than sorted.
+        """
+        matches = heapq.merge(
+            _RE_UID_TAG.finditer(content), _RE_UID_CSV.finditer(content), key=lambda m: m.start()
+        )
+        for m in matches:
+            yield m.group(1).decode("ascii").upper(), m.start()
+
+    def _extract_all_keys_from_context(
+        self, context: bytes | mmap.mmap, pos: int = 0, endpos: int = sys.maxsize
+    ) -> dict[str, str | None]:
         """Extract all 3 key types from a log context.
 
         Looks for various log patterns that contain key information:
@@ -130,7 +263,10 @@ class KeyRecoveryService:
         - TagKeys repr: "PICC Master Key: <hex>"
 
         Args:
-            context: Text context to search
+            context: Log bytes to search
+            pos: Offset where the search window starts
+            endpos: Offset where the search window ends; the window is searched in
+                place, so no copy of it is made
 
         Returns:
             Dict with keys 'picc', 'app_read', 'sdm_mac' (None if not found)
@@ -139,48 +275,65 @@ class KeyRecoveryService:
 
         # Pattern 1: Direct key logging from provisioning_service.py
         # "PICC Master Key: 6eaaf5f76a12cab506926ccf0b48275d"
-        picc_direct = re.search(r'PICC Master Key:\s*([0-9a-fA-F]{32})', context)
+        picc_direct = _RE_PICC_DIRECT.search(context, pos, endpos)
         if picc_direct:
-            result['picc'] = picc_direct.group(1).upper()
+            result['picc'] = picc_direct.group(1).decode('ascii').upper()
 
         # "App Read Key: 75049c19dd53acb97acb011bc9552e50"
-        app_direct = re.search(r'App Read Key:\s*([0-9a-fA-F]{32})', context)
+        app_direct = _RE_APP_DIRECT.search(context, pos, endpos)
         if app_direct:
-            result['app_read'] = app_direct.group(1).upper()
+            result['app_read'] = app_direct.group(1).decode('ascii').upper()
 
         # "SDM MAC Key: 034e5593a0379b042f6ea9020fa82893" or "SDM MAC Key (Key 3): ..."
-        sdm_direct = re.search(r'SDM MAC Key(?:\s*\(Key 3\))?:\s*([0-9a-fA-F]{32})', context)
+        sdm_direct = _RE_SDM_DIRECT.search(context, pos, endpos)
         if sdm_direct:
-            result['sdm_mac'] = sdm_direct.group(1).upper()
+            result['sdm_mac'] = sdm_direct.group(1).decode('ascii').upper()
 
         # Pattern 2: CSV update logs with Python repr format
         # "picc_master_key='6eaaf5f76a12cab506926ccf0b48275d'"
         if not result['picc']:
-            picc_csv = re.search(r"picc_master_key='([0-9a-fA-F]{32})'", context)
+            picc_csv = _RE_PICC_CSV.search(context, pos, endpos)
             if picc_csv:
-                result['picc'] = picc_csv.group(1).upper()
+                result['picc'] = picc_csv.group(1).decode('ascii').upper()
 
         if not result['app_read']:
-            app_csv = re.search(r"app_read_key='([0-9a-fA-F]{32})'", context)
+            app_csv = _RE_APP_CSV.search(context, pos, endpos)
             if app_csv:
-                result['app_read'] = app_csv.group(1).upper()
+                result['app_read'] = app_csv.group(1).decode('ascii').upper()
 
         if not result['sdm_mac']:
-            sdm_csv = re.search(r"sdm_mac_key='([0-9a-fA-F]{32})'", context)
+            sdm_csv = _RE_SDM_CSV.search(context, pos, endpos)
             if sdm_csv:
-                result['sdm_mac'] = sdm_csv.group(1).upper()
+                result['sdm_mac'] = sdm_csv.group(1).decode('ascii').upper()
 
         # Pattern 3: Auth key pattern (PICC only, fallback)
         # "Auth key: 6EAAF5F76A12CAB506926CCF0B48275D"
         if not result['picc']:
-            auth_key = re.search(r'Auth key:\s*([0-9a-fA-F]{32})', context)
+            auth_key = _RE_AUTH.search(context, pos, endpos)
             if auth_key:
-                result['picc'] = auth_key.group(1).upper()
+                result['picc'] = auth_key.group(1).decode('ascii').upper()
 
         return result
 
-    def _scan_log_for_keys(self, log_file: Path, uid_normalized: str) -> list[KeyRecoveryCandidate]:
-        """Extract keys from a TUI log file for a specific UID.
+    def scan_file(self, file_path: Path, uid: str | None = None) -> list[KeyRecoveryCandidate]:
+        """Extract key candidates from one CSV backup or TUI log file.
+
+        Args:
+            file_path: A key database CSV (or backup of one) or a tui_*.log file
+            uid: Only return candidates for this tag; None returns every tag's
+
+        Returns:
+            Non-factory key candidates in file order; empty for other file types
+        """
+        uid_normalized = uid.upper().replace(" ", "") if uid is not None else None
+        if _is_csv_file(file_path.name):
+            return self._scan_csv_for_keys(file_path, uid_normalized)
+        if _is_tui_log(file_path.name):
+            return self._scan_log_for_keys(file_path, uid_normalized)
+        return []
+
+    def _scan_log_for_keys(self, log_file: Path, uid_normalized: str | None) -> list[KeyRecoveryCandidate]:
+        """Extract keys from a TUI log file for a specific UID, or for every UID it mentions.
 
         Parses log files for all key patterns:
         - PICC Master Key: <hex>
@@ -191,7 +344,7 @@ class KeyRecoveryService:
 
         Args:
             log_file: Path to log file
-            uid_normalized: Normalized UID (uppercase, no spaces)
+            uid_normalized: Normalized UID (uppercase, no spaces), or None for every UID
 
         Returns:
             List of key candidates found in this log file
@@ -199,34 +352,40 @@ class KeyRecoveryService:
         candidates = []
 
         try:
-            with log_file.open("r", encoding="utf-8", errors="ignore") as f:
-                content = f.read()
-
-            # Find all UID mentions
-            uid_pattern = r'Tag UID:\s*([0-9A-Fa-f]{14})'
-            uid_matches = list(re.finditer(uid_pattern, content))
-
-            # Also find UIDs in CSV update format: "UID 04B6694A2F7080" or "uid='04B6694A2F7080'"
-            uid_csv_pattern = r"(?:UID|uid[=:])[\s']*([0-9A-Fa-f]{14})"
-            uid_csv_matches = list(re.finditer(uid_csv_pattern, content))
-
-            all_uid_positions = []
-            for m in uid_matches:
-                if m.group(1).upper() == uid_normalized:
-                    all_uid_positions.append(m.start())
-            for m in uid_csv_matches:
-                if m.group(1).upper() == uid_normalized:
-                    all_uid_positions.append(m.start())
-
-            if not all_uid_positions:
-                return candidates
+            with self._map_file(log_file) as content:
+                mentions_by_uid: dict[str, Iterable[int]]
+                if uid_normalized is None:
+                    mentions_by_uid = {}
+                    for uid, pos in self._find_uid_mentions(content):
+                        mentions_by_uid.setdefault(uid, []).append(pos)
+                else:
+                    # Most logs never mention this tag; reject them before running the UID patterns
+                    if not _contains_uid(content, uid_normalized.encode("ascii")):
+                        return candidates
+                    tag_re, csv_re = _uid_patterns(uid_normalized)
+                    mentions_by_uid = {
+                        uid_normalized: heapq.merge(
+                            (m.start() for m in tag_re.finditer(content)),
+                            (m.start() for m in csv_re.finditer(content)),
+                        )
+                    }
+
+                key_sets: list[tuple[str, dict[str, str | None]]] = []
+                for uid, mentions in mentions_by_uid.items():
+                    # Mentions are in file order; skip those close together (within 1000 bytes)
+                    deduped_positions: list[int] = []
+                    for pos in mentions:
+                        if not deduped_positions or pos - deduped_positions[-1] > 1000:
+                            deduped_positions.append(pos)
+
+                    # For each UID mention, look for all keys in the _CONTEXT_BYTES after it
+                    key_sets.extend(
+                        (uid, self._extract_all_keys_from_context(content, start_pos, start_pos + _CONTEXT_BYTES))
+                        for start_pos in deduped_positions
+                    )
 
-            # Deduplicate positions that are close together (within 1000 chars)
-            all_uid_positions = sorted(set(all_uid_positions))
-            deduped_positions = []
-            for pos in all_uid_positions:
-                if not deduped_positions or pos - deduped_positions[-1] > 1000:
-                    deduped_positions.append(pos)
+            if not key_sets:
+                return candidates
 
             # Extract date from log filename
             file_date = self._extract_date_from_file(log_file)
@@ -237,36 +396,39 @@ class KeyRecoveryService:
             except ValueError:
                 relative_path = log_file
 
-            # For each UID mention, look for all keys in nearby context
-            for start_pos in deduped_positions:
-                # Search within 50000 chars after this UID
-                context = content[start_pos:start_pos + 50000]
-
-                # Extract all keys from context
-                keys = self._extract_all_keys_from_context(context)
+            # The same key set is usually logged at several UID mentions. All of
+            # them share this file's date, so only the first can win the dedup in
+            # scan_for_uid; skip decoding the repeats.
+            seen_keys: set[tuple[str | None, ...]] = set()
 
+            for uid, keys in key_sets:
                 # Skip if no PICC key found
                 if not keys['picc']:
                     continue
 
+                key_strs = (uid, keys['picc'], keys['app_read'], keys['sdm_mac'])
+                if key_strs in seen_keys:
+                    continue
+                seen_keys.add(key_strs)
+
                 # Skip factory keys (all zeros)
-                if keys['picc'] == "00000000000000000000000000000000":
+                if keys['picc'] == _FACTORY_KEY_HEX:
                     continue
 
                 try:
                     picc_key = bytes.fromhex(keys['picc'])
-                    app_read_key = bytes.fromhex(keys['app_read']) if keys['app_read'] else bytes(16)
-                    sdm_mac_key = bytes.fromhex(keys['sdm_mac']) if keys['sdm_mac'] else bytes(16)
+                    app_read_key = bytes.fromhex(keys['app_read']) if keys['app_read'] else FACTORY_KEY
+                    sdm_mac_key = bytes.fromhex(keys['sdm_mac']) if keys['sdm_mac'] else FACTORY_KEY
 
                     # Skip if app/sdm keys are factory (only PICC is non-factory)
-                    app_is_factory = app_read_key == bytes(16) or keys['app_read'] == "00000000000000000000000000000000"
-                    sdm_is_factory = sdm_mac_key == bytes(16) or keys['sdm_mac'] == "00000000000000000000000000000000"
+                    app_is_factory = app_read_key == FACTORY_KEY or keys['app_read'] == _FACTORY_KEY_HEX
+                    sdm_is_factory = sdm_mac_key == FACTORY_KEY or keys['sdm_mac'] == _FACTORY_KEY_HEX
 
                     # Normalize factory keys to zeros
-                    if keys['app_read'] == "00000000000000000000000000000000":
-                        app_read_key = bytes(16)
-                    if keys['sdm_mac'] == "00000000000000000000000000000000":
-                        sdm_mac_key = bytes(16)
+                    if keys['app_read'] == _FACTORY_KEY_HEX:
+                        app_read_key = FACTORY_KEY
+                    if keys['sdm_mac'] == _FACTORY_KEY_HEX:
+                        sdm_mac_key = FACTORY_KEY
 
                     # Determine completeness for notes
                     if not app_is_factory and not sdm_is_factory:
@@ -280,7 +442,7 @@ class KeyRecoveryService:
                         status = "log_picc_only"
 
                     candidate = KeyRecoveryCandidate(
-                        uid=uid_normalized,
+                        uid=uid,
                         source_file=f"{relative_path} (log)",
                         picc_master_key=picc_key,
                         app_read_key=app_read_key,
@@ -302,6 +464,91 @@ class KeyRecoveryService:
 
         return candidates
 
+    def _scan_csv_for_keys(self, csv_file: Path, uid_normalized: str | None) -> list[KeyRecoveryCandidate]:
+        """Extract key sets for a specific UID, or for every UID, from a key database CSV.
+
+        Args:
+            csv_file: Path to CSV file (main database, backup or timestamped copy)
+            uid_normalized: Normalized UID (uppercase, no spaces), or None for every UID
+
+        Returns:
+            List of non-factory key candidates found in this file, in row order
+        """
+        candidates = []
+        # Backups repeat a tag's row on every change. Rows of one file share its
+        # date, so only the first row with a given key set can win the dedup in
+        # scan_for_uid; skip decoding the repeats.
+        seen_keys: set[str] = set()
+
+        try:
+            # Most CSVs in a backup tree never mention this tag; reject them before parsing
+            if uid_normalized is not None:
+                with self._map_file(csv_file) as content:
+                    if not _contains_uid(content, uid_normalized.encode("ascii")):
+                        return candidates
+
+            with csv_file.open("r", encoding="utf-8") as f:
+                reader = csv.reader(f)
+                header = next(reader, None)
+                if header is None:
+                    return candidates
+
+                # Resolve columns once; most rows are rejected on the UID alone
+                uid_idx = header.index("uid")
+                picc_idx = header.index("picc_master_key")
+                app_idx = header.index("app_read_key")
+                status_idx = header.index("status")
+                date_idx = header.index("provisioned_date")
+                notes_idx = header.index("notes") if "notes" in header else None
+                # Handle both old (sdm_mac_key) and new (sdm_file_read_key) column names
+                sdm_idxs = [header.index(name) for name in ("sdm_file_read_key", "sdm_mac_key") if name in header]
+
+                for row in reader:
+                    if row and (uid_normalized is None or row[uid_idx].upper() == uid_normalized):
+                        sdm_key = next((row[i] for i in sdm_idxs if row[i]), "")
+
+                        key_str = (row[uid_idx] + row[picc_idx] + row[app_idx] + sdm_key).upper()
+                        if key_str in seen_keys:
+                            continue
+                        seen_keys.add(key_str)
+
+                        picc_key = bytes.fromhex(row[picc_idx])
+
+                        # Skip factory keys (all zeros)
+                        if picc_key == FACTORY_KEY:
+                            log.debug(f"Skipping factory key (all zeros) from {csv_file}")
+                            continue
+
+                        # Extract date from filename or use mtime
+                        file_date = self._extract_date_from_file(csv_file)
+
+                        # Get relative path from root
+                        try:
+                            relative_path = csv_file.relative_to(self.root_path)
+                        except ValueError:
+                            relative_path = csv_file
+
+                        app_read_key = bytes.fromhex(row[app_idx])
+                        sdm_file_read_key = bytes.fromhex(sdm_key)
+
+                        candidate = KeyRecoveryCandidate(
+                            uid=row[uid_idx],
+                            source_file=str(relative_path),
+                            picc_master_key=picc_key,
+                            app_read_key=app_read_key,
+                            sdm_file_read_key=sdm_file_read_key,
+                            status=row[status_idx],
+                            provisioned_date=row[date_idx],
+                            notes=row[notes_idx] if notes_idx is not None else "",
+                            file_date=file_date,
+                        )
+                        candidates.append(candidate)
+
+        except Exception as e:
+            log.debug(f"Error reading {csv_file}: {e}")
+
+        return candidates
+
     def scan_for_uid(self, uid: str) -> list[KeyRecoveryCandidate]:
         """Scan all CSV files and log files for matching UID, deduplicate by all 3 keys.
 
@@ -315,8 +562,18 @@ class KeyRecoveryService:
             Deduplicated list of key candidates, sorted by completeness then file date
         """
         uid_normalized = uid.upper().replace(" ", "")
-        csv_files = self.find_all_csv_files()
-        log_files = self.find_all_log_files()
+        csv_found, log_found = self._find_recovery_files()
+
+        # Reuse the last result for this UID while no file was added, removed or
+        # modified. Callers get copies, since test_key_candidate() marks them.
+        signature = (tuple(csv_found), tuple(log_found))
+        cached = self._scan_cache.get(uid_normalized)
+        if cached is not None and cached[0] == signature:
+            log.info(f"Reusing {len(cached[1])} cached key set candidates for UID {uid_normalized}")
+            return [replace(c) for c in cached[1]]
+
+        csv_files = [path for path, _mtime in csv_found]
+        log_files = [path for path, _mtime in log_found]
 
         log.info(f"Scanning {len(csv_files)} CSV + {len(log_files)} log files for UID {uid_normalized}")
 
@@ -324,92 +581,45 @@ class KeyRecoveryService:
         # Key: (picc_master_key, app_read_key, sdm_file_read_key)
         candidates_dict: dict[tuple[bytes, bytes, bytes], KeyRecoveryCandidate] = {}
 
-        def _get_completeness_score(candidate: KeyRecoveryCandidate) -> int:
-            """Return completeness score: 2 = complete, 1 = partial, 0 = PICC only."""
-            app_zero = candidate.app_read_key == bytes(16)
-            sdm_zero = candidate.sdm_file_read_key == bytes(16)
-            if not app_zero and not sdm_zero:
-                return 2  # Complete
-            elif not app_zero or not sdm_zero:
-                return 1  # Partial
-            else:
-                return 0  # PICC only
-
-        # Scan CSV files first (these usually have complete key sets)
-        for csv_file in csv_files:
-            try:
-                with csv_file.open("r", encoding="utf-8") as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        if row["uid"].upper() == uid_normalized:
-                            picc_key = bytes.fromhex(row["picc_master_key"])
-
-                            # Skip factory keys (all zeros)
-                            if picc_key == bytes(16):
-                                log.debug(f"Skipping factory key (all zeros) from {csv_file}")
-                                continue
-
-                            # Extract date from filename or use mtime
-                            file_date = self._extract_date_from_file(csv_file)
-
-                            # Get relative path from root
-                            try:
-                                relative_path = csv_file.relative_to(self.root_path)
-                            except ValueError:
-                                relative_path = csv_file
-
-                            # Handle both old (sdm_mac_key) and new (sdm_file_read_key) column names
-                            sdm_key = row.get("sdm_file_read_key") or row.get("sdm_mac_key", "")
-
-                            app_read_key = bytes.fromhex(row["app_read_key"])
-                            sdm_file_read_key = bytes.fromhex(sdm_key)
-
-                            candidate = KeyRecoveryCandidate(
-                                uid=row["uid"],
-                                source_file=str(relative_path),
-                                picc_master_key=picc_key,
-                                app_read_key=app_read_key,
-                                sdm_file_read_key=sdm_file_read_key,
-                                status=row["status"],
-                                provisioned_date=row["provisioned_date"],
-                                notes=row.get("notes", ""),
-                                file_date=file_date,
-                            )
-
-                            # Deduplicate by all three keys
-                            key_tuple = (picc_key, app_read_key, sdm_file_read_key)
-                            if key_tuple not in candidates_dict or candidate.file_date > candidates_dict[key_tuple].file_date:
-                                candidates_dict[key_tuple] = candidate
-
-            except Exception as e:
-                log.debug(f"Error reading {csv_file}: {e}")
-                continue
-
-        # Scan log files for additional keys
-        for log_file in log_files:
-            log_candidates = self._scan_log_for_keys(log_file, uid_normalized)
-            for candidate in log_candidates:
-                # Skip factory keys
-                if candidate.picc_master_key == bytes(16):
-                    log.debug(f"Skipping factory key from log {log_file.name}")
-                    continue
-
-                # Deduplicate by all three keys
-                key_tuple = (candidate.picc_master_key, candidate.app_read_key, candidate.sdm_file_read_key)
-                if key_tuple not in candidates_dict:
-                    candidates_dict[key_tuple] = candidate
-                    log.debug(f"Found new key set in log: {log_file.name}")
-                # If duplicate, keep the one with newer date
-                elif candidate.file_date > candidates_dict[key_tuple].file_date:
-                    candidates_dict[key_tuple] = candidate
+        # Files are scanned concurrently; map() hands results back in file order,
+        # so the dedup below still sees CSV files first (these usually have
+        # complete key sets), newest first.
+        with ThreadPoolExecutor(thread_name_prefix="key-recovery") as pool:
+            csv_results = pool.map(lambda f: self._scan_csv_for_keys(f, uid_normalized), csv_files)
+            log_results = pool.map(lambda f: self._scan_log_for_keys(f, uid_normalized), log_files)
+
+            for csv_candidates in csv_results:
+                for candidate in csv_candidates:
+                    # Deduplicate by all three keys
+                    key_tuple = (candidate.picc_master_key, candidate.app_read_key, candidate.sdm_file_read_key)
+                    if key_tuple not in candidates_dict or candidate.file_date > candidates_dict[key_tuple].file_date:
+                        candidates_dict[key_tuple] = candidate
+
+            # Add log file keys
+            for log_file, log_candidates in zip(log_files, log_results):
+                for candidate in log_candidates:
+                    # Skip factory keys
+                    if candidate.picc_master_key == FACTORY_KEY:
+                        log.debug(f"Skipping factory key from log {log_file.name}")
+                        continue
+
+                    # Deduplicate by all three keys
+                    key_tuple = (candidate.picc_master_key, candidate.app_read_key, candidate.sdm_file_read_key)
+                    if key_tuple not in candidates_dict:
+                        candidates_dict[key_tuple] = candidate
+                        log.debug(f"Found new key set in log: {log_file.name}")
+                    # If duplicate, keep the one with newer date
+                    elif candidate.file_date > candidates_dict[key_tuple].file_date:
+                        candidates_dict[key_tuple] = candidate
 
         candidates = list(candidates_dict.values())
 
         # Sort by: 1) completeness (complete first), 2) file_date (newest first)
-        candidates.sort(key=lambda c: (-_get_completeness_score(c), c.file_date), reverse=True)
+        candidates.sort(key=lambda c: (-c.score, c.file_date), reverse=True)
 
         log.info(f"Found {len(candidates)} unique key set candidates for UID {uid_normalized}")
-        return candidates
+        self._scan_cache[uid_normalized] = (signature, candidates)
+        return [replace(c) for c in candidates]
 
     def test_key_candidate(
         self, candidate: KeyRecoveryCandidate, card: NTag424CardConnection
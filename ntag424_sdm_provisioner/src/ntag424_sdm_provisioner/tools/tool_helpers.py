@@ -9,6 +9,7 @@ Provides reusable utilities that follow DRY principle:
 import logging
 
 from ntag424_sdm_provisioner.commands.change_file_settings import ChangeFileSettingsAuth
+from ntag424_sdm_provisioner.commands.get_chip_version import GetChipVersion, Ntag424VersionInfo
 from ntag424_sdm_provisioner.commands.iso_commands import ISOFileID, ISOReadBinary, ISOSelectFile
 from ntag424_sdm_provisioner.commands.sdm_helpers import calculate_sdm_offsets
 from ntag424_sdm_provisioner.commands.select_picc_application import SelectPiccApplication
@@ -25,6 +26,29 @@ from ntag424_sdm_provisioner.hal import NTag424CardConnection
 
 log = logging.getLogger(__name__)
 
+_PICC_AID = bytes(SelectPiccApplication.PICC_AID)
+
+
+def select_picc_application(card: NTag424CardConnection) -> None:
+    """Select the PICC application unless this connection already has it selected.
+
+    Connections that don't track selection (e.g. the simulator) always get the APDU.
+    """
+    if getattr(card, "selected_aid", None) == _PICC_AID:
+        log.debug("PICC application already selected - skipping SELECT")
+        return
+    card.send(SelectPiccApplication())
+
+
+def get_chip_version(card: NTag424CardConnection) -> Ntag424VersionInfo:
+    """GetChipVersion, cached on the connection for the rest of the card session."""
+    version = getattr(card, "version_info", None)
+    if version is None:
+        version = card.send(GetChipVersion())
+        if hasattr(card, "version_info"):
+            card.version_info = version
+    return version  # type: ignore[no-any-return]
+
 
 def read_ndef_file(card: NTag424CardConnection) -> bytes:
     """Read entire NDEF file from tag.
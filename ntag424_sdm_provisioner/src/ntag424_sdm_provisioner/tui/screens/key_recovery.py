@@ -1,9 +1,7 @@
 """Key Recovery Screen - Discover and recover lost keys from backup files."""
 
-import csv
 import logging
 import os
-import re
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
@@ -251,129 +249,18 @@ class KeyRecoveryScreen(Screen):
             # Single os.walk - collect from both CSV and log files
             for dirpath, _dirnames, filenames in os.walk(self.recovery_service.root_path):
                 for filename in filenames:
-                    file_path = Path(dirpath) / filename
-
-                    # Process CSV files
                     if filename.endswith('.csv'):
                         csv_count += 1
-                        try:
-                            with file_path.open("r", encoding="utf-8") as f:
-                                reader = csv.DictReader(f)
-                                for row in reader:
-                                    uid = row["uid"].upper()
-                                    file_date = self.recovery_service._extract_date_from_file(file_path)
-
-                                    try:
-                                        relative_path = file_path.relative_to(self.recovery_service.root_path)
-                                    except ValueError:
-                                        relative_path = file_path
-
-                                    # Handle both column name variants
-                                    sdm_key = row.get("sdm_file_read_key") or row.get("sdm_mac_key", "")
-
-                                    candidate = KeyRecoveryCandidate(
-                                        uid=uid,
-                                        source_file=str(relative_path),
-                                        picc_master_key=bytes.fromhex(row["picc_master_key"]),
-                                        app_read_key=bytes.fromhex(row["app_read_key"]),
-                                        sdm_file_read_key=bytes.fromhex(sdm_key),
-                                        status=row["status"],
-                                        provisioned_date=row["provisioned_date"],
-                                        notes=row.get("notes", ""),
-                                        file_date=file_date,
-                                    )
-
-                                    if uid not in all_candidates_by_uid:
-                                        all_candidates_by_uid[uid] = []
-                                    all_candidates_by_uid[uid].append(candidate)
-                        except Exception as e:
-                            log.debug(f"Error reading CSV {file_path}: {e}")
-
-                    # Process log files
                     elif filename.startswith('tui_') and filename.endswith('.log'):
                         log_count += 1
-                        try:
-                            with file_path.open("r", encoding="utf-8", errors="ignore") as f:
-                                content = f.read()
-
-                            # Find all UIDs in various formats
-                            uid_pattern = r'Tag UID:\s*([0-9A-Fa-f]{14})'
-                            uid_csv_pattern = r"(?:UID|uid[=:])[\s']*([0-9A-Fa-f]{14})"
-
-                            all_uid_matches = [
-                                (m.group(1).upper(), m.start())
-                                for m in re.finditer(uid_pattern, content)
-                            ]
-                            all_uid_matches.extend(
-                                (m.group(1).upper(), m.start())
-                                for m in re.finditer(uid_csv_pattern, content)
-                            )
-
-                            # Group by UID and dedupe positions
-                            uid_positions: dict[str, list[int]] = {}
-                            for uid, pos in all_uid_matches:
-                                if uid not in uid_positions:
-                                    uid_positions[uid] = []
-                                uid_positions[uid].append(pos)
-
-                            file_date = self.recovery_service._extract_date_from_file(file_path)
-                            try:
-                                relative_path = file_path.relative_to(self.recovery_service.root_path)
-                            except ValueError:
-                                relative_path = file_path
-
-                            for uid, uid_pos_list in uid_positions.items():
-                                sorted_positions = sorted(set(uid_pos_list))
-                                deduped = []
-                                for pos in sorted_positions:
-                                    if not deduped or pos - deduped[-1] > 1000:
-                                        deduped.append(pos)
-
-                                for start_pos in deduped:
-                                    context = content[start_pos:start_pos + 50000]
-                                    keys = self.recovery_service._extract_all_keys_from_context(context)
-
-                                    if not keys['picc'] or keys['picc'] == "00000000000000000000000000000000":
-                                        continue
-
-                                    try:
-                                        picc_key = bytes.fromhex(keys['picc'])
-                                        app_key = bytes.fromhex(keys['app_read']) if keys['app_read'] and keys['app_read'] != "00000000000000000000000000000000" else bytes(16)
-                                        sdm_key = bytes.fromhex(keys['sdm_mac']) if keys['sdm_mac'] and keys['sdm_mac'] != "00000000000000000000000000000000" else bytes(16)
-
-                                        app_is_zero = app_key == bytes(16)
-                                        sdm_is_zero = sdm_key == bytes(16)
-                                        if not app_is_zero and not sdm_is_zero:
-                                            status = "log_complete"
-                                            notes = "Complete key set from TUI log"
-                                        elif not app_is_zero or not sdm_is_zero:
-                                            status = "log_partial"
-                                            notes = "Partial key set from TUI log"
-                                        else:
-                                            status = "log_picc_only"
-                                            notes = "PICC only from TUI log"
-
-                                        candidate = KeyRecoveryCandidate(
-                                            uid=uid,
-                                            source_file=f"{relative_path} (log)",
-                                            picc_master_key=picc_key,
-                                            app_read_key=app_key,
-                                            sdm_file_read_key=sdm_key,
-                                            status=status,
-                                            provisioned_date=file_date,
-                                            notes=notes,
-                                            file_date=file_date,
-                                        )
-
-                                        if uid not in all_candidates_by_uid:
-                                            all_candidates_by_uid[uid] = []
-                                        all_candidates_by_uid[uid].append(candidate)
-
-                                    except (ValueError, IndexError) as e:
-                                        log.debug(f"Failed to parse keys: {e}")
-
-                        except Exception as e:
-                            log.debug(f"Error reading log {file_path}: {e}")
+                    else:
+                        continue
+
+                    for candidate in self.recovery_service.scan_file(Path(dirpath) / filename):
+                        uid = candidate.uid.upper()
+                        if uid not in all_candidates_by_uid:
+                            all_candidates_by_uid[uid] = []
+                        all_candidates_by_uid[uid].append(candidate)
 
             # Deduplicate and build summaries
             self.uid_summaries = {}
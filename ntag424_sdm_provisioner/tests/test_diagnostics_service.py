@@ -1,13 +1,16 @@
+import asyncio
 from unittest.mock import MagicMock
 
 import pytest
 from ntag424_sdm_provisioner.uid_utils import UID
 
-from ntag424_sdm_provisioner.constants import TagStatus
+from ntag424_sdm_provisioner.constants import FileNo, TagStatus
 from ntag424_sdm_provisioner.csv_key_manager import CsvKeyManager, TagKeys
 from ntag424_sdm_provisioner.sequence_logger import create_sequence_logger
 from ntag424_sdm_provisioner.seritag_simulator import SeritagCardManager
-from ntag424_sdm_provisioner.services.diagnostics_service import TagDiagnosticsService
+from ntag424_sdm_provisioner.commands.base import ApduError
+from ntag424_sdm_provisioner.commands.get_key_version import GetKeyVersion
+from ntag424_sdm_provisioner.services.diagnostics_service import TagDiagnosticsService, _error_kind
 
 
 class TestTagDiagnosticsService:
@@ -58,6 +61,49 @@ class TestTagDiagnosticsService:
             
             assert status == TagStatus.PROVISIONED
             
+    def test_get_tag_status_is_resolved_once(self, simulator, mock_key_mgr):
+        """Repeat status checks reuse the cached UID/keys instead of re-querying."""
+        mock_keys = MagicMock(spec=TagKeys)
+        mock_keys.status = 'provisioned'
+        mock_key_mgr.get_tag_keys.return_value = mock_keys
+
+        with simulator as card:
+            service = TagDiagnosticsService(card, mock_key_mgr)
+            service.get_full_diagnostics()
+
+            assert service.get_tag_status() == TagStatus.PROVISIONED
+            assert service.get_tag_status() == TagStatus.PROVISIONED
+            mock_key_mgr.get_tag_keys.assert_called_once()
+
+    def test_invalidate_reloads_keys(self, simulator, mock_key_mgr):
+        """Newly provisioned keys are picked up after invalidate()."""
+        mock_key_mgr.get_tag_keys.side_effect = Exception("Not found")
+
+        with simulator as card:
+            service = TagDiagnosticsService(card, mock_key_mgr)
+            assert service.get_tag_status() == TagStatus.FACTORY
+
+            mock_keys = MagicMock(spec=TagKeys)
+            mock_keys.status = 'provisioned'
+            mock_key_mgr.get_tag_keys.side_effect = None
+            mock_key_mgr.get_tag_keys.return_value = mock_keys
+            service.invalidate(UID("00000000000000"))
+            assert service.get_tag_status() == TagStatus.FACTORY
+
+            service.invalidate(service._cached_uid)
+            assert service.get_tag_status() == TagStatus.PROVISIONED
+
+    def test_get_file_settings_is_cached_until_cleared(self, simulator, mock_key_mgr):
+        """Diagnostics read each file's settings once per run."""
+        with simulator as card:
+            service = TagDiagnosticsService(card, mock_key_mgr)
+            first = service.get_file_settings(FileNo.NDEF_FILE)
+            assert first is not None
+
+            assert service.get_file_settings(FileNo.NDEF_FILE) is first
+            service.clear_cache()
+            assert service.get_file_settings(FileNo.NDEF_FILE) is not first
+
     def test_get_key_versions(self, simulator, mock_key_mgr):
         """Test retrieving key versions."""
         with simulator as card:
@@ -67,6 +113,26 @@ class TestTagDiagnosticsService:
             assert len(versions) == 5
             assert versions['key_0'] == "0x00" # Simulator returns 0x00 by default
             
+    def test_get_key_versions_continues_after_card_status_word(self, simulator, mock_key_mgr):
+        """A card error on one key is reported for that key only; transport errors stop the loop."""
+        with simulator as card:
+            service = TagDiagnosticsService(card, mock_key_mgr)
+            service.get_key_versions()  # load UID/keys before patching send
+            send = card.send
+
+            def fail_key_1(command):
+                if isinstance(command, GetKeyVersion) and command.key_no == 1:
+                    raise ApduError("GetKeyVersion failed", 0x91, 0xAE)
+                return send(command)
+
+            card.send = fail_key_1
+            versions = service.get_key_versions()
+            assert versions['key_1'] == "error"
+            assert versions['key_0'] == versions['key_2'] == versions['key_4'] == "0x00"
+
+            card.send = MagicMock(side_effect=Exception("Card removed"))
+            assert set(service.get_key_versions().values()) == {"error"}
+
     def test_get_full_diagnostics(self, simulator, mock_key_mgr):
         """Test full diagnostics collection."""
         with simulator as card:
@@ -80,3 +146,47 @@ class TestTagDiagnosticsService:
             assert 'ndef' in diag
 
             assert diag['chip']['uid'] == "043F684A2F7080"  # SeritagSimulator UID
+
+    def test_get_full_diagnostics_reads_ndef_once(self, simulator, mock_key_mgr):
+        """The phone tap simulation reuses the NDEF read made for the report."""
+        with simulator as card:
+            service = TagDiagnosticsService(card, mock_key_mgr)
+            service.read_ndef = MagicMock(wraps=service.read_ndef)
+            service.get_full_diagnostics()
+
+            service.read_ndef.assert_called_once()
+
+    def test_get_full_diagnostics_async(self, simulator, mock_key_mgr):
+        """The async variant returns the same report as the blocking call."""
+        with simulator as card:
+            service = TagDiagnosticsService(card, mock_key_mgr)
+            diag = asyncio.run(service.get_full_diagnostics_async())
+
+            assert diag.keys() == service.get_full_diagnostics().keys()
+            assert diag['chip']['uid'].uid == "043F684A2F7080"
+
+    def test_android_checks_fast_mode_skips_cc_read(self, simulator, mock_key_mgr):
+        """With fast=True a failed read-access check skips the CC file APDUs."""
+        with simulator as card:
+            service = TagDiagnosticsService(card, mock_key_mgr)
+            service.get_file_settings = MagicMock(return_value=None)
+            service.read_cc_file = MagicMock()
+
+            checks = service._check_android_nfc_conditions(b"", None, fast=True)
+
+            assert checks["all_conditions_pass"] is False
+            assert checks["details"]["cc_file"].startswith("Skipped")
+            service.read_cc_file.assert_not_called()
+
+
+@pytest.mark.parametrize("error, expected", [
+    (ApduError("GetFileIds failed", 0x91, 0x1C), "not_supported"),
+    (ApduError("GetKeyVersion failed", 0x91, 0x40), "no_such_key"),
+    (ApduError("GetFileSettings failed", 0x91, 0x9D), "permission_denied"),
+    (ApduError("GetKeyVersion failed", 0x91, 0xAE), None),
+    (Exception("NTAG_PERMISSION_DENIED (0x919D)"), "permission_denied"),
+    (Exception("Card removed"), None),
+])
+def test_error_kind(error, expected):
+    """Status words dispatch by value; plain exceptions fall back to the message."""
+    assert _error_kind(error) == expected
@@ -1,7 +1,7 @@
 import pytest
 from unittest.mock import patch, MagicMock
 
-from ntag424_sdm_provisioner.server.app import app, init_managers
+from ntag424_sdm_provisioner.server.app import create_app
 from ntag424_sdm_provisioner.csv_key_manager import CsvKeyManager, TagKeys, Outcome
 from ntag424_sdm_provisioner.uid_utils import UID
 
@@ -13,9 +13,9 @@ def integration_client(tmp_path):
     with open(key_file, "w") as f:
         f.write("uid,picc_master_key,app_read_key,sdm_mac_key,outcome,coin_name,provisioned_date,status,notes,last_used_date\n")
 
+    app = create_app(key_csv_path=str(key_file), db_path=str(db_file))
     app.config['TESTING'] = True
-    init_managers(app, str(key_file), str(db_file))
-    
+
     with app.test_client() as client:
         yield client
 
@@ -24,6 +24,7 @@ def test_full_flow_with_real_managers(integration_client, tmp_path):
     This is an integration test that uses the real CsvKeyManager and SqliteGameStateManager.
     """
     # 1. Setup: Get the real managers from the app
+    app = integration_client.application
     key_manager = app.key_manager
     game_manager = app.game_manager
 
@@ -0,0 +1,165 @@
+"""Tests for KeyRecoveryService scanning of CSV backups and TUI logs."""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from ntag424_sdm_provisioner.services.key_recovery_service import KeyRecoveryService
+
+
+UID_STR = "04B6694A2F7080"
+PICC_KEY = "6EAAF5F76A12CAB506926CCF0B48275D"
+APP_KEY = "75049C19DD53ACB97ACB011BC9552E50"
+SDM_KEY = "034E5593A0379B042F6EA9020FA82893"
+
+# One APDU trace line, as the HAL logs between "Tag UID" and the key lines
+TRACE_LINE = ">> 90C4000029 00112233445566778899AABBCCDDEEFF\n"
+
+
+CSV_HEADER = "uid,picc_master_key,app_read_key,sdm_file_read_key,outcome,coin_name,provisioned_date,status,notes"
+LEGACY_CSV_HEADER = "uid,picc_master_key,app_read_key,sdm_mac_key,outcome,coin_name,provisioned_date,status,notes"
+
+
+def write_csv(root: Path, name: str, rows: list[str], header: str = CSV_HEADER) -> Path:
+    csv_file = root / name
+    csv_file.parent.mkdir(parents=True, exist_ok=True)
+    csv_file.write_text("\n".join([header, *rows]) + "\n")
+    return csv_file
+
+
+def csv_row(uid: str = UID_STR, picc: str = PICC_KEY, app: str = APP_KEY, sdm: str = SDM_KEY) -> str:
+    return f"{uid},{picc},{app},{sdm},heads,SWIFT-FALCON,2025-12-18T22:30:14,provisioned,"
+
+
+def write_log(root: Path, name: str, text: str) -> Path:
+    log_file = root / "logs" / name
+    log_file.parent.mkdir(parents=True, exist_ok=True)
+    log_file.write_text(text)
+    return log_file
+
+
+def provisioning_log(uid: str = UID_STR, trace_lines: int = 0) -> str:
+    """A provisioning run: the UID first, then APDU traces, then the keys."""
+    return (
+        f"Starting provisioning...\n  Tag UID: {uid}\n"
+        + TRACE_LINE * trace_lines
+        + f"  PICC Master Key: {PICC_KEY}\n  App Read Key: {APP_KEY}\n  SDM MAC Key (Key 3): {SDM_KEY}\n"
+    )
+
+
+class TestLogContextWindow:
+
+    def test_keys_after_long_apdu_trace_are_found(self, tmp_path):
+        """Keys 300 trace lines (~17 KB) after the UID are inside the search window."""
+        write_log(tmp_path, "tui_20251219_101010.log", provisioning_log(trace_lines=300))
+
+        candidates = KeyRecoveryService(tmp_path).scan_for_uid(UID_STR)
+
+        assert len(candidates) == 1
+        assert candidates[0].picc_master_key == bytes.fromhex(PICC_KEY)
+        assert candidates[0].status == "log_complete"
+
+    def test_keys_beyond_50kb_are_not_attributed_to_the_uid(self, tmp_path):
+        """The window is capped at 50 KB after the mention."""
+        trace_lines = 50000 // len(TRACE_LINE) + 1
+        write_log(tmp_path, "tui_20251219_101010.log", provisioning_log(trace_lines=trace_lines))
+
+        assert KeyRecoveryService(tmp_path).scan_for_uid(UID_STR) == []
+
+
+class TestScanFile:
+
+    def test_log_without_uid_returns_every_tag(self, tmp_path):
+        """The TUI's discovery pass collects candidates for every UID a log mentions."""
+        other_uid = "04A1B2C3D4E5F6"
+        other_log = provisioning_log(uid=other_uid).replace(PICC_KEY, "11" * 16)
+        log_file = write_log(tmp_path, "tui_20251219_101010.log", provisioning_log() + "\n" * 1000 + other_log)
+
+        service = KeyRecoveryService(tmp_path)
+        by_uid = {c.uid: c.picc_master_key for c in service.scan_file(log_file)}
+
+        assert by_uid == {UID_STR: bytes.fromhex(PICC_KEY), other_uid: bytes.fromhex("11" * 16)}
+        assert [c.uid for c in service.scan_file(log_file, other_uid.lower())] == [other_uid]
+
+    def test_other_file_types_are_ignored(self, tmp_path):
+        notes = tmp_path / "notes.txt"
+        notes.write_text(provisioning_log())
+
+        assert KeyRecoveryService(tmp_path).scan_file(notes) == []
+
+
+class TestScanForUid:
+
+    def test_csv_and_log_candidates(self, tmp_path):
+        """CSV rows and log key sets are both candidates; factory rows and repeats are dropped."""
+        log_picc = "22" * 16
+        write_csv(tmp_path, "tag_keys.csv", [csv_row(), csv_row(picc="00" * 16)])
+        write_csv(tmp_path, ".history/tag_keys_backup_20251218_223014.csv", [csv_row()])
+        write_log(tmp_path, "tui_20251219_101010.log", provisioning_log().replace(PICC_KEY, log_picc))
+
+        candidates = KeyRecoveryService(tmp_path).scan_for_uid(UID_STR)
+
+        by_picc = {c.picc_master_key.hex().upper(): c for c in candidates}
+        assert by_picc.keys() == {PICC_KEY, log_picc}
+        csv_candidate = by_picc[PICC_KEY]
+        assert csv_candidate.status == "provisioned"
+        assert csv_candidate.sdm_file_read_key == bytes.fromhex(SDM_KEY)
+        assert csv_candidate.score == 2
+        log_candidate = by_picc[log_picc]
+        assert log_candidate.source_file == str(Path("logs") / "tui_20251219_101010.log") + " (log)"
+        assert log_candidate.file_date == "2025-12-19"
+
+    def test_legacy_sdm_mac_key_column(self, tmp_path):
+        write_csv(tmp_path, "tag_keys.csv", [csv_row()], header=LEGACY_CSV_HEADER)
+
+        (candidate,) = KeyRecoveryService(tmp_path).scan_for_uid(UID_STR)
+
+        assert candidate.sdm_file_read_key == bytes.fromhex(SDM_KEY)
+
+    def test_lower_case_uids(self, tmp_path):
+        """UIDs match regardless of case in the query, the CSV and the log."""
+        write_csv(tmp_path, "tag_keys.csv", [csv_row(uid=UID_STR.lower())])
+        log_picc = "33" * 16
+        write_log(
+            tmp_path,
+            "tui_20251219_101010.log",
+            f"Updated uid='{UID_STR.lower()}' picc_master_key='{log_picc.lower()}' app_read_key='{APP_KEY}'\n",
+        )
+
+        candidates = KeyRecoveryService(tmp_path).scan_for_uid("04 b6 69 4a 2f 70 80")
+
+        assert {c.picc_master_key.hex().upper() for c in candidates} == {PICC_KEY, log_picc}
+        assert {c.status for c in candidates} == {"provisioned", "log_partial"}
+
+    def test_empty_files(self, tmp_path):
+        (tmp_path / "tag_keys.csv").write_text("")
+        write_log(tmp_path, "tui_20251219_101010.log", "")
+
+        assert KeyRecoveryService(tmp_path).scan_for_uid(UID_STR) == []
+
+
+class TestScanCache:
+
+    def test_cached_results_are_copies(self, tmp_path):
+        write_csv(tmp_path, "tag_keys.csv", [csv_row()])
+        service = KeyRecoveryService(tmp_path)
+
+        first = service.scan_for_uid(UID_STR)
+        first[0].tested = first[0].works = True
+        second = service.scan_for_uid(UID_STR)
+
+        assert second[0] is not first[0]
+        assert (second[0].tested, second[0].works) == (False, False)
+        assert second[0].picc_master_key == first[0].picc_master_key
+
+    def test_modified_file_invalidates_cache(self, tmp_path):
+        csv_file = write_csv(tmp_path, "tag_keys.csv", [csv_row()])
+        service = KeyRecoveryService(tmp_path)
+        assert len(service.scan_for_uid(UID_STR)) == 1
+
+        write_csv(tmp_path, "tag_keys.csv", [csv_row(), csv_row(picc="44" * 16)])
+        mtime = csv_file.stat().st_mtime + 10
+        os.utime(csv_file, (mtime, mtime))
+
+        assert len(service.scan_for_uid(UID_STR)) == 2
@@ -32,13 +32,15 @@ def services():
     fos = FlipOffService(db_path=str(DB_PATH))
     yield gsm, fos
 
+    gsm.close()
     shutil.rmtree(DB_PATH.parent)
 
 
 def add_flips(gsm: SqliteGameStateManager, coin: str, outcomes: list[str]) -> None:
     """Helper: insert scan_logs entries for a coin."""
     for i, outcome in enumerate(outcomes, start=1):
-        gsm.update_state(f"04{coin[:6].encode().hex()}{i:04x}", i, outcome, coin)
+        gsm.update_state(f"04{coin[:6].encode().hex()}{i:04x}".upper(), i, outcome, coin)
+    gsm.flush()  # FlipOffService reads scan_logs on its own connection
 
 
 # --- Challenge Creation ---
@@ -1,9 +1,13 @@
+import asyncio
 import pytest
 from pathlib import Path
 import shutil
+import sqlite3
+import threading
 
+from ntag424_sdm_provisioner.crypto.crypto_primitives import calculate_entropy, nist_frequency_monobit_test
 from ntag424_sdm_provisioner.server.app import create_app
-from ntag424_sdm_provisioner.server.game_state_manager import SqliteGameStateManager
+from ntag424_sdm_provisioner.server.game_state_manager import _READ_POOL_SIZE, SqliteGameStateManager
 from ntag424_sdm_provisioner.csv_key_manager import CsvKeyManager, Outcome, TagKeys, UID
 from ntag424_sdm_provisioner.server.jokes import JOKES, get_random_joke
 
@@ -46,6 +50,7 @@ def test_client():
             # Yield the client and the game manager for direct manipulation
             yield client, app.game_manager
 
+    app.game_manager.close()
     # Teardown: remove the temporary directory
     shutil.rmtree(temp_dir)
 
@@ -110,6 +115,7 @@ def test_leaderboard_groups_by_coin_name(test_client):
     assert falcon_stats['total_bits'] == 2
     assert falcon_stats['total_heads'] == 0
     assert falcon_stats['total_tails'] == 2
+    assert falcon_stats['last_flip_timestamp'] == game_manager.get_state("0402000000002B").last_seen
 
 
 def test_global_analysis_returns_correct_aggregates(test_client):
@@ -146,6 +152,217 @@ def test_api_recent_flips_returns_correct_totals(test_client):
     assert json_data_test['totals']['tails'] == 3
 
 
+def test_api_recent_flips_etag_returns_304_until_new_flip(test_client):
+    """Unchanged polls short-circuit with 304; a new flip invalidates the ETag."""
+    client, game_manager = test_client
+    populate_test_data(game_manager)
+
+    response = client.get('/api/recent_flips')
+    etag = response.headers['ETag']
+    assert etag
+
+    unchanged = client.get('/api/recent_flips', headers={'If-None-Match': etag})
+    assert unchanged.status_code == 304
+    assert unchanged.data == b''
+
+    # Test mode reports different totals, so it must not share the ETag
+    test_mode = client.get('/api/recent_flips?drew_test_outcome=heads', headers={'If-None-Match': etag})
+    assert test_mode.status_code == 200
+
+    game_manager.update_state("0402000000002A", 2, "tails", "SWIFT-FALCON")
+    changed = client.get('/api/recent_flips', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    assert changed.get_json()['totals']['tails'] == 4
+
+
+def test_update_state_buffered_scans_reach_disk_without_a_read(test_client):
+    """A buffered scan arms the background flush, which writes it without any read."""
+    _, game_manager = test_client
+    game_manager.update_state("0401000000001A", 1, "heads", "HANDSOME-HERON")
+    assert game_manager._flush_timer is not None
+
+    game_manager.flush()
+    assert game_manager._flush_timer is None
+    with sqlite3.connect(game_manager.db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM scan_logs").fetchone()[0] == 1
+
+
+def test_failed_flush_keeps_buffered_scans(test_client, monkeypatch):
+    """Rows from a failed insert stay buffered, so the DB catches up with the totals."""
+    _, game_manager = test_client
+    game_manager.update_state("0401000000001A", 1, "heads", "HANDSOME-HERON")
+
+    def busy_writer():
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(game_manager, "_writer", busy_writer)
+    with pytest.raises(sqlite3.OperationalError):
+        game_manager.flush()
+    assert len(game_manager._pending) == 1
+    assert game_manager._flush_timer is not None  # retry scheduled
+
+    monkeypatch.undo()
+    game_manager.update_state("0402000000002A", 2, "tails", "SWIFT-FALCON")
+    game_manager.flush()
+    with sqlite3.connect(game_manager.db_path) as conn:
+        assert conn.execute("SELECT counter FROM scan_logs ORDER BY id").fetchall() == [(1,), (2,)]
+    assert game_manager.get_totals() == {"heads": 1, "tails": 1}
+
+
+def test_cached_aggregates_are_invalidated_by_new_scans(test_client):
+    """get_totals/get_leaderboard_stats serve from cache but never go stale after a scan."""
+    _, game_manager = test_client
+    populate_test_data(game_manager)
+
+    assert game_manager.get_totals() == {"heads": 4, "tails": 3}
+    board = game_manager.get_leaderboard_stats()
+    board[0]["coin_name"] = "MUTATED"  # callers get copies, not the cached entries
+    assert game_manager.get_leaderboard_stats()[0]["coin_name"] != "MUTATED"
+
+    game_manager.update_state("0402000000002A", 2, "heads", "SWIFT-FALCON")
+    assert game_manager.get_totals() == {"heads": 5, "tails": 3}
+    swift = next(c for c in game_manager.get_leaderboard_stats() if c["coin_name"] == "SWIFT-FALCON")
+    assert swift["total_heads"] == 1
+
+
+def test_get_totals_by_coin_pivots_outcomes_per_coin(test_client):
+    """Named coins get one heads/tails entry each; unnamed scans are skipped."""
+    _, game_manager = test_client
+    populate_test_data(game_manager)
+
+    assert game_manager.get_totals_by_coin() == {
+        "HANDSOME-HERON": {"heads": 3, "tails": 1},
+        "SWIFT-FALCON": {"heads": 0, "tails": 2},
+        "TEST-COIN": {"heads": 1, "tails": 0},
+    }
+
+
+def test_update_state_many_writes_batch_before_returning(test_client):
+    """A batch is on disk once update_state_many returns, after earlier buffered scans."""
+    _, game_manager = test_client
+    game_manager.update_state("0401000000001A", 1, "heads", "HANDSOME-HERON")
+    game_manager.update_state_many([
+        ("0401000000001A", 2, "tails", "HANDSOME-HERON", "", False),
+        ("0402000000002A", 1, "heads", "SWIFT-FALCON", "", True),
+    ])
+
+    with sqlite3.connect(game_manager.db_path) as conn:
+        rows = conn.execute("SELECT hex(uid), counter, is_test FROM scan_logs ORDER BY id").fetchall()
+    assert rows == [("0401000000001A", 1, 0), ("0401000000001A", 2, 0), ("0402000000002A", 1, 1)]
+    assert game_manager.get_totals(include_test=True) == {"heads": 2, "tails": 1}
+
+
+def test_query_iter_streams_every_row_in_chunks(test_client):
+    _, game_manager = test_client
+    populate_test_data(game_manager)
+
+    rows = list(game_manager._query_iter("SELECT id FROM scan_logs ORDER BY id", chunk_size=3))
+    assert rows == game_manager._query_all("SELECT id FROM scan_logs ORDER BY id")
+    assert len(rows) == 8
+
+
+def test_randomness_stats_from_counts_match_the_packed_byte_tests(test_client):
+    """Counting in SQL gives the same entropy/monobit results as testing the packed bits."""
+    _, game_manager = test_client
+    outcomes = ["heads" if i % 3 else "tails" for i in range(123)]
+    for counter, outcome in enumerate(outcomes, start=1):
+        game_manager.update_state("0401000000001A", counter, outcome, "HANDSOME-HERON")
+
+    packed = bytearray((len(outcomes) + 7) // 8)
+    for i, outcome in enumerate(outcomes):
+        if outcome == "heads":
+            packed[i >> 3] |= 0x80 >> (i & 7)
+
+    stats = game_manager.analyze_flip_sequence_randomness(coin_name="HANDSOME-HERON")
+    assert stats["entropy"] == calculate_entropy(bytes(packed))
+    assert (stats["nist_monobit_p_value"], stats["nist_monobit_passed"]) == nist_frequency_monobit_test(bytes(packed))
+
+
+def test_randomness_analysis_is_cached_until_a_new_flip(test_client):
+    """Repeat analyses are served from cache; a new flip forces a fresh one."""
+    _, game_manager = test_client
+    populate_test_data(game_manager)
+
+    first = game_manager.analyze_flip_sequence_randomness()
+    assert game_manager.analyze_flip_sequence_randomness() == first
+
+    game_manager.update_state("0402000000002A", 2, "heads", "SWIFT-FALCON")
+    updated = asyncio.run(game_manager.analyze_async())
+    assert updated["total_bits"] == first["total_bits"] + 1
+    assert updated["total_heads"] == first["total_heads"] + 1
+
+
+def test_pooled_read_connections_reject_writes(test_client):
+    """Only the shared writer may modify scan_logs."""
+    _, game_manager = test_client
+    with pytest.raises(sqlite3.OperationalError):
+        with game_manager._reader() as conn:
+            conn.execute("DELETE FROM scan_logs")
+
+
+def test_read_connections_are_bounded(test_client):
+    """Reads from many threads share the fixed pool instead of opening a connection each."""
+    _, game_manager = test_client
+    populate_test_data(game_manager)
+
+    threads = [threading.Thread(target=game_manager.get_recent_flips) for _ in range(3 * _READ_POOL_SIZE)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(game_manager._conns) == _READ_POOL_SIZE + 1  # readers plus the writer
+
+
+def test_new_databases_reject_mixed_case_outcomes(test_client):
+    """Fresh scan_logs tables enforce the lowercase-outcome invariant in the schema."""
+    _, game_manager = test_client
+    with pytest.raises(sqlite3.IntegrityError):
+        with game_manager._writer() as conn:
+            conn.execute("INSERT INTO scan_logs (uid, counter, outcome) VALUES (x'04AA', 1, 'HEADS')")
+
+
+def test_legacy_mixed_case_outcomes_are_normalized_on_startup(tmp_path):
+    """Rows written before outcomes were lowercased still count toward totals."""
+    db_path = tmp_path / "legacy.db"
+    with sqlite3.connect(db_path) as conn:
+        # scan_logs as created before the lowercase CHECK constraint
+        conn.execute("""
+            CREATE TABLE scan_logs (
+                id INTEGER PRIMARY KEY, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                uid TEXT NOT NULL, counter INTEGER NOT NULL, outcome TEXT NOT NULL, cmac TEXT,
+                coin_name TEXT DEFAULT '', is_test BOOLEAN NOT NULL DEFAULT FALSE
+            )
+        """)
+        conn.execute("INSERT INTO scan_logs (uid, counter, outcome) VALUES ('04AA', 1, 'HEADS')")
+        conn.execute("INSERT INTO scan_logs (uid, counter, outcome) VALUES ('04AA', 2, 'Tails')")
+        conn.execute("PRAGMA user_version = 2")  # written before the outcome migration
+
+    game_manager = SqliteGameStateManager(db_path=str(db_path))
+    assert game_manager.get_totals() == {"heads": 1, "tails": 1}
+    game_manager.close()
+
+
+def test_legacy_text_uids_are_converted_to_blobs(tmp_path):
+    """Hex-text UIDs from before the BLOB migration are still found by get_state."""
+    db_path = tmp_path / "legacy.db"
+    SqliteGameStateManager(db_path=str(db_path)).close()
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "INSERT INTO scan_logs (uid, counter, outcome, coin_name) "
+            "VALUES ('0401000000001A', 7, 'heads', 'HANDSOME-HERON')"
+        )
+        conn.execute("PRAGMA user_version = 3")  # written before the BLOB migration
+
+    game_manager = SqliteGameStateManager(db_path=str(db_path))
+    assert game_manager.get_state("0401000000001A").last_counter == 7
+    assert game_manager.get_recent_flips()[0]["uid"] == "0401000000001A"
+    game_manager.close()
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT typeof(uid) FROM scan_logs").fetchone()[0] == "blob"
+
+
 # --- Dad Jokes tests ---
 
 def test_jokes_catalog_has_minimum_entries():
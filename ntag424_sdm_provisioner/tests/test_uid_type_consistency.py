@@ -217,3 +217,60 @@ class TestCsvKeyManagerUidHandling:
 
         assert len(rows) == 1, f"Expected 1 row, got {len(rows)} rows"
         assert rows[0]["picc_master_key"] == "DD" * 16
+
+    def test_update_tag_fields_updates_existing_row(self, temp_csv):
+        """update_tag_fields rewrites only the given fields of the matching row."""
+        keys = TagKeys(
+            uid=UID("04B3664A2F7080"),
+            picc_master_key="AA" * 16,
+            app_read_key="BB" * 16,
+            sdm_mac_key="CC" * 16,
+            provisioned_date="2025-01-01T00:00:00",
+            status="provisioned",
+        )
+        temp_csv.save_tag_keys(keys)
+
+        assert temp_csv.update_tag_fields(UID("04b3664a2f7080"), picc_master_key="00" * 16, status="reformatted")
+
+        retrieved = temp_csv.get_tag_keys(UID("04B3664A2F7080"))
+        assert retrieved.picc_master_key == "00" * 16
+        assert retrieved.app_read_key == "BB" * 16
+        assert retrieved.status == "reformatted"
+
+    def test_update_tag_fields_ignores_unknown_uid(self, temp_csv):
+        """update_tag_fields does not add rows for tags not in the database."""
+        assert not temp_csv.update_tag_fields(UID("04B3664A2F7080"), status="reformatted")
+        assert temp_csv.list_tags() == []
+
+    def test_update_tag_fields_rejects_unknown_field(self, temp_csv):
+        """update_tag_fields only accepts TagKeys field names."""
+        with pytest.raises(ValueError):
+            temp_csv.update_tag_fields(UID("04B3664A2F7080"), not_a_field="x")
+
+    def test_session_defers_writes_until_exit(self, temp_csv):
+        """Changes made inside session() are visible immediately and hit disk once on exit."""
+        keys = TagKeys(
+            uid=UID("04B3664A2F7080"),
+            picc_master_key="AA" * 16,
+            app_read_key="BB" * 16,
+            sdm_mac_key="CC" * 16,
+            provisioned_date="2025-01-01T00:00:00",
+            status="provisioned",
+        )
+        temp_csv.save_tag_keys(keys)
+        on_disk = temp_csv.csv_path.read_text()
+
+        with temp_csv.session():
+            assert temp_csv.update_tag_fields(UID("04B3664A2F7080"), status="reformatted")
+            assert temp_csv.get_tag_keys(UID("04B3664A2F7080")).status == "reformatted"
+            assert temp_csv.csv_path.read_text() == on_disk
+
+        assert temp_csv.get_tag_keys(UID("04B3664A2F7080")).status == "reformatted"
+        assert not temp_csv.csv_path.with_name(temp_csv.csv_path.name + ".tmp").exists()
+
+    def test_session_without_changes_does_not_write(self, temp_csv):
+        """A read-only session leaves the CSV untouched."""
+        mtime = temp_csv.csv_path.stat().st_mtime_ns
+        with temp_csv.session():
+            assert temp_csv.list_tags() == []
+        assert temp_csv.csv_path.stat().st_mtime_ns == mtime